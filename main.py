@@ -1,4 +1,25 @@
-from src.components.app import run_app
+import sys
 
 if __name__ == '__main__':
-    run_app()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == '--ingest':
+        from src.components.ingest import run_ingest
+        run_ingest(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == '--cli':
+        # Thin client: talks to a running daemon and only loads the models itself if there is none
+        from src.components.client import run_client
+        sys.exit(run_client(sys.argv[2:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == '--warmup':
+        # Warm-up runs inside the web server, which owns the caches and the API quota
+        from src.components.client import run_warmup_client
+        sys.exit(run_warmup_client(sys.argv[2:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == '--daemon':
+        from src.components.threads import configure_threads
+        configure_threads('daemon')
+        from src.components.daemon import run_daemon
+        run_daemon()
+    else:
+        # Thread settings must be in place before torch and the models load
+        from src.components.threads import configure_threads
+        configure_threads('web')
+        from src.components.app import run_app
+        run_app()
\ No newline at end of file
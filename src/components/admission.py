@@ -0,0 +1,134 @@
+import os
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from dotenv import load_dotenv
+
+# main.py imports this (via threads) before any other module has read .env
+load_dotenv()
+
+# Request admission for /search
+SEARCH_MAX_IN_FLIGHT = int(os.getenv('SEARCH_MAX_IN_FLIGHT', '8'))
+SEARCH_MAX_QUEUE = int(os.getenv('SEARCH_MAX_QUEUE', '16'))
+SEARCH_QUEUE_TIMEOUT = float(os.getenv('SEARCH_QUEUE_TIMEOUT', '2.0'))
+# Seconds from arrival a search has in total; every queue it waits in only gets what is left
+SEARCH_DEADLINE = float(os.getenv('SEARCH_DEADLINE', '10.0'))
+
+# Concurrency limits for the expensive stages inside a search
+STAGE_LIMITS = {
+    'llm': int(os.getenv('STAGE_LLM_LIMIT', '4')),
+    'api': int(os.getenv('STAGE_API_LIMIT', '4')),
+    'encode': int(os.getenv('STAGE_ENCODE_LIMIT', '2'))
+}
+STAGE_QUEUE_TIMEOUT = float(os.getenv('STAGE_QUEUE_TIMEOUT', '5.0'))
+
+EWMA_ALPHA = 0.2
+
+class AdmissionController:
+    """
+    Bounded in-flight limit with a short wait queue that drops requests unlikely to make their deadline
+    """
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, name: str = 'search'):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.service_time = None
+        self.counts = {'admitted': 0, 'shed': 0, 'timed_out': 0}
+        self._cond = threading.Condition()
+
+    def _expected_wait(self) -> float:
+        """Rough wait for a newly queued request given the queue ahead of it"""
+        if self.service_time is None:
+            return 0.0
+        return self.service_time * (self.queue_depth + 1) / self.max_in_flight
+
+    def acquire(self, timeout: Optional[float] = None, deadline: Optional[float] = None) -> bool:
+        """
+        Take an in-flight slot, waiting in the queue up to the timeout; False means shed
+
+        A request deadline (time.monotonic() based) cuts the wait to the time the request has left.
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        if deadline is not None:
+            timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+        with self._cond:
+            if self.in_flight < self.max_in_flight and not self.queue_depth:
+                self.in_flight += 1
+                self.counts['admitted'] += 1
+                return True
+
+            # Shed early when the queue is full or the wait would blow the deadline anyway
+            if self.queue_depth >= self.max_queue or self._expected_wait() > timeout:
+                self.counts['shed'] += 1
+                return False
+
+            self.queue_depth += 1
+            deadline = time.monotonic() + timeout
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counts['timed_out'] += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.queue_depth -= 1
+
+            self.in_flight += 1
+            self.counts['admitted'] += 1
+            return True
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if elapsed is not None:
+                self.service_time = elapsed if self.service_time is None \
+                    else self.service_time + EWMA_ALPHA * (elapsed - self.service_time)
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self, timeout: Optional[float] = None, deadline: Optional[float] = None) -> Iterator[bool]:
+        """
+        Context manager yielding whether the caller was admitted
+        """
+        admitted = self.acquire(timeout, deadline)
+        start = time.monotonic()
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release(time.monotonic() - start)
+
+    def retry_after(self) -> int:
+        """
+        Seconds a shed client should wait before retrying
+        """
+        with self._cond:
+            wait = self._expected_wait() if self.service_time else self.queue_timeout
+        return max(1, math.ceil(wait))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'queue_depth': self.queue_depth,
+                'max_queue': self.max_queue,
+                'service_time': round(self.service_time, 3) if self.service_time is not None else None,
+                **self.counts
+            }
+
+def search_deadline() -> float:
+    """Deadline for a search arriving now, to pass to admit()"""
+    return time.monotonic() + SEARCH_DEADLINE
+
+search_admission = AdmissionController(SEARCH_MAX_IN_FLIGHT, SEARCH_MAX_QUEUE, SEARCH_QUEUE_TIMEOUT)
+stage_limits = {
+    stage: AdmissionController(limit, SEARCH_MAX_QUEUE, STAGE_QUEUE_TIMEOUT, name=stage)
+    for stage, limit in STAGE_LIMITS.items()
+}
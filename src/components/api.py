@@ -1,8 +1,11 @@
 import os
 import requests
+from urllib3.exceptions import HTTPError as StreamError
 from dotenv import load_dotenv
-from datetime import datetime
 from src.logger import setup_logger
+from src.components.recipe import Recipe
+from src.components.scheduler import QuotaScheduler, INTERACTIVE
+from src.components.cache import TTLCache
 
 # Setup logger
 logger = setup_logger()
@@ -14,94 +17,178 @@ load_dotenv()
 API_KEY = os.getenv('API_KEY')
 BASE_URL = 'https://api.spoonacular.com/recipes'
 
-# API limit tracking
-DAILY_LIMIT = 150
-api_calls = {
-    'count': 0,
-    'reset_time': datetime.now()
+# Lean fetch mode: incremental parsing of the response into compact records
+LEAN_FETCH = os.getenv('SPOONACULAR_LEAN_FETCH', 'true').lower() == 'true'
+
+# Connect and read timeouts for Spoonacular, so a stalled response cannot hold a stage slot
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', '3.05'))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', '10'))
+API_TIMEOUT = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+
+# Prefixes of the complexSearch payload that make it into a recipe record
+_RECIPE_PREFIX = 'results.item'
+_SCALAR_FIELDS = {
+    'results.item.title': 'name',
+    'results.item.readyInMinutes': 'readyInMinutes',
+    'results.item.servings': 'servings',
+    'results.item.sourceUrl': 'sourceUrl',
+    'results.item.instructions': 'instructions',
 }
+_INGREDIENT_PREFIX = 'results.item.extendedIngredients.item.original'
+_INSTRUCTION_BLOCK_PREFIX = 'results.item.analyzedInstructions.item'
+_STEP_PREFIX = 'results.item.analyzedInstructions.item.steps.item.step'
+
+# Every upstream call is paced through the quota scheduler
+quota = QuotaScheduler()
+
+# Recent search results keyed by (search query, number, offset, keyword fallback), shared with the warm-up job
+RESULTS_CACHE_SIZE = 512
+RESULTS_CACHE_TTL = int(os.getenv('RESULTS_CACHE_TTL', str(12 * 3600)))
+results_cache = TTLCache(RESULTS_CACHE_SIZE, RESULTS_CACHE_TTL)
 
 if not API_KEY: 
     logger.error("API_KEY environment variable is not set")
     logger.error("Please make sure you have created a .env file with your API key")
     raise ValueError("API key is required")
 
-def check_api_limit():
-    """Check if we've hit the daily API limit"""
-    global api_calls
-    
-    # Reset counter if it's a new day
-    now = datetime.now()
-    if now.date() > api_calls['reset_time'].date():
-        api_calls = {
-            'count': 0,
-            'reset_time': now
-        }
-    
-    # Check if we've hit the limit
-    if api_calls['count'] >= DAILY_LIMIT:
-        return False
-    
-    return True
-
-def increment_api_counter():
-    """Increment the API call counter"""
-    global api_calls
-    api_calls['count'] += 1
-
-def search_recipes(query, search_query, number=3):
+def _new_record():
+    """Create an empty compact recipe record"""
+    return {
+        'name': '',
+        'ingredients': [],
+        'steps': [],
+        'readyInMinutes': 0,
+        'servings': 0,
+        'sourceUrl': '',
+        'instructions': '',
+        'instruction_blocks': 0
+    }
+
+def _finish_record(record):
+    """Turn a parsed record into a Recipe"""
+    if not record['instruction_blocks']:
+        record['steps'] = (record['instructions'] or '').split('\n')
+    return Recipe.from_dict(record)
+
+def _stream_recipes(stream):
+    """
+    Parse a complexSearch response incrementally, keeping only the fields we use
+    """
+    import ijson
+
+    record = None
+    events = ijson.parse(stream)
+    while True:
+        try:
+            prefix, event, value = next(events)
+        except StopIteration:
+            return
+        except ijson.JSONError as e:
+            raise ValueError(f"Malformed API response: {e}") from e
+
+        if prefix == _RECIPE_PREFIX:
+            if event == 'start_map':
+                record = _new_record()
+            elif event == 'end_map':
+                yield _finish_record(record)
+                record = None
+        elif record is None:
+            continue
+        elif prefix in _SCALAR_FIELDS and event in ('string', 'number'):
+            field = _SCALAR_FIELDS[prefix]
+            record[field] = int(value) if event == 'number' else value
+        elif prefix == _INGREDIENT_PREFIX and event == 'string':
+            record['ingredients'].append(value)
+        elif prefix == _INSTRUCTION_BLOCK_PREFIX and event == 'start_map':
+            record['instruction_blocks'] += 1
+        elif prefix == _STEP_PREFIX and event == 'string' and record['instruction_blocks'] == 1:
+            record['steps'].append(value)
+
+def _fetch_recipes(params):
+    """
+    Call complexSearch and return Recipe records
+    """
+    if not LEAN_FETCH:
+        response = requests.get(f'{BASE_URL}/complexSearch', params=params, timeout=API_TIMEOUT)
+        response.raise_for_status()
+        return [Recipe.from_spoonacular(recipe) for recipe in response.json()['results']]
+
+    response = requests.get(f'{BASE_URL}/complexSearch', params=params, timeout=API_TIMEOUT, stream=True)
+    try:
+        response.raise_for_status()
+        try:
+            import ijson  # noqa: F401
+        except ImportError:
+            logger.debug("ijson not installed, parsing full response")
+            return [Recipe.from_spoonacular(recipe) for recipe in response.json()['results']]
+
+        response.raw.decode_content = True
+        return list(_stream_recipes(response.raw))
+    except StreamError as e:
+        # Reading response.raw raises urllib3 errors rather than requests ones
+        raise ValueError(f"API response interrupted: {e}") from e
+    finally:
+        response.close()
+
+def _quota_error(priority):
+    """
+    Tell a call that is only being paced (API_BUSY) apart from one that is out of budget for today
+    """
+    if quota.wait_time(priority) is None:
+        logger.warning(f"API budget exhausted for {priority} request")
+        return {'error': 'API_LIMIT_REACHED'}
+    logger.warning(f"API budget paced for {priority} request")
+    return {'error': 'API_BUSY'}
+
+def search_recipes(query, search_query, number=3, priority=INTERACTIVE, offset=0, keyword_fallback=True):
     """
     Search recipes using Spoonacular API
+
+    When the full query finds nothing, each keyword is tried alone unless keyword_fallback is off
+    (later pages should end rather than drift to recipes matching a single keyword).
     """
     try:
-        # Check API limit
-        if not check_api_limit():
-            logger.warning("Daily API limit reached. Please try again tomorrow.")
-            return {'error': 'API_LIMIT_REACHED'}
+        cache_key = (' '.join(search_query.lower().split()), number, offset, keyword_fallback)
+        cached = results_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Serving {len(cached)} cached recipes for: {search_query}")
+            return list(cached)
+        
+        # Check API budget
+        if not quota.acquire(priority):
+            return _quota_error(priority)
             
         params = {
             'apiKey': API_KEY,
             'query': search_query,
             'number': number * 2,
+            'offset': offset,
             'addRecipeInformation': True,
             'fillIngredients': True,
             'instructionsRequired': True
         }
         
-        response = requests.get(f'{BASE_URL}/complexSearch', params=params)
-        response.raise_for_status()
-        increment_api_counter()  # Increment counter after successful API call
-        results = response.json()['results']
+        recipes = _fetch_recipes(params)
         
-        if not results and len(search_query.split()) > 1:
+        if not recipes and keyword_fallback and len(search_query.split()) > 1:
             for keyword in search_query.split():
+                if not quota.acquire(priority):
+                    logger.warning("API budget exhausted, skipping single keyword retries")
+                    break
                 params['query'] = keyword
                 logger.info(f"Trying with single keyword: {keyword}")
-                response = requests.get(f'{BASE_URL}/complexSearch', params=params)
-                response.raise_for_status()
-                results = response.json()['results']
-                if results:
+                recipes = _fetch_recipes(params)
+                if recipes:
                     break
         
-        if not results:
+        if not recipes:
             logger.info("No results found")
             return []
             
-        logger.info(f"Found {len(results)} recipes")
-        recipes = []
-        for recipe in results:
-            recipes.append({
-                'name': recipe['title'],
-                'ingredients': [ingredient['original'] for ingredient in recipe.get('extendedIngredients', [])],
-                'steps': [step['step'] for step in recipe.get('analyzedInstructions', [{}])[0].get('steps', [])]
-                        if recipe.get('analyzedInstructions') else recipe.get('instructions', '').split('\n'),
-                'readyInMinutes': recipe.get('readyInMinutes', 0),
-                'servings': recipe.get('servings', 0),
-                'sourceUrl': recipe.get('sourceUrl', '')
-            })
-            
+        logger.info(f"Found {len(recipes)} recipes")
+        results_cache.set(cache_key, recipes)
         return recipes
         
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError, KeyError) as e:
         logger.error(f"API Error: {str(e)}")
-        return []
\ No newline at end of file
+        return []
@@ -1,13 +1,30 @@
+import os
 import sys
+import hmac
+import json
+import math
 import time
 from collections import defaultdict
 from flask import Flask, request, jsonify, render_template
 import torch
 from sentence_transformers import SentenceTransformer
-from src.components.api import search_recipes
+from src.components.api import search_recipes, quota
+from src.components.recipe import to_recipes
+from src.components.pantry import IngredientIndex, parse_pantry
+from src.components.retrieval import HybridRetriever
+from src.components.ingest import MODEL_NAME, load_corpus
+from src.components.embedding_cache import EmbeddingCache
+from src.components.admission import search_admission, stage_limits, search_deadline
+from src.components.pagination import SearchCursor, cursor_store
+from src.components.profiling import profiler, current_rss, install_signal_handler
+from src.components.threads import settings as thread_settings
+from src.components.scheduler import INTERACTIVE, BATCH
+from src.components.warmup import QueryTracker, WarmupJob, WARMUP_SCHEDULER
+from src.components.warmup import start_scheduler as start_warmup_scheduler
 from src.components.llm import understand_query as llm_understand_query
 from src.components.llm import extract_excluded_ingredients as llm_extract_excluded
-from src.components.llm import validate_input, GuardrailViolation
+from src.components.llm import validate_input, GuardrailViolation, llm_client
+from src.components.llm import check_food_relevance_batch, food_verdicts, EMBEDDING
 from src.logger import setup_logger
 
 # Setup logger
@@ -16,15 +33,59 @@ logger = setup_logger()
 # Initialize Flask app
 app = Flask(__name__)
 
+# Token guarding the /admin routes; they are disabled when it is unset
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
 # Initialize the transformer model 
 logger.info("Loading Transformer model...") 
-model = SentenceTransformer('all-MiniLM-L6-v2') 
-cached_recipes = [] 
-recipe_embeddings = None 
+rss_before_model = current_rss()
+model = SentenceTransformer(MODEL_NAME) 
+# Includes the tokenizer and runtime, which tracemalloc cannot see
+model_load_rss = current_rss() - rss_before_model if rss_before_model is not None else None
+ingredient_index = IngredientIndex()
+
+def encode_texts(texts):
+    """Encode texts into normalized numpy embeddings"""
+    return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+# Recipe embeddings keyed by text hash, so repeated recipes are never re-encoded
+embedding_cache = EmbeddingCache(MODEL_NAME, model.get_sentence_embedding_dimension())
+
+# Local corpus of ingested recipes plus every recipe fetched so far, for offline answers
+recipe_retriever = HybridRetriever(encode_texts)
+corpus_recipes, corpus_embeddings = load_corpus()
+if corpus_recipes:
+    recipe_retriever.add(corpus_recipes, corpus_embeddings)
+    ingredient_index.add(corpus_recipes)
+
+def memory_footprint():
+    """Sizes in MB of the model and the embedding matrices held by this process"""
+    mb = lambda size: round(size / (1 << 20), 1) if size is not None else None
+    parameters = sum(p.numel() * p.element_size() for p in model.parameters())
+    buffers = sum(b.numel() * b.element_size() for b in model.buffers())
+    return {
+        'model_parameters': mb(parameters + buffers),
+        'model_load_rss': mb(model_load_rss),
+        'corpus_embeddings': mb(recipe_retriever.nbytes),
+        'embedding_cache_mapped': mb(embedding_cache.capacity * embedding_cache.dim * 2)
+    }
+
+profiler.footprint = memory_footprint
+
+# Search modes accepted by process_query and /search
+SEARCH_MODES = ('default', 'pantry')
+
+# Candidates kept from local (non-API) sources for later pages
+LOCAL_RESULTS_DEPTH = 30
 
 # Rate limiting
 request_counts = defaultdict(list)
 
+# Popular query tracking for cache warm-up
+query_tracker = QueryTracker()
+# One warm-up job per server, run by the scheduler or on demand through /admin/warmup
+warmup = WarmupJob(query_tracker, lambda query: process_query(query, priority=BATCH), quota)
+
 def is_rate_limited(ip):
     """Check if the IP is rate limited"""
     now = time.time()
@@ -36,27 +97,28 @@ def is_rate_limited(ip):
     return len(request_counts[ip]) > 5
 
 def cache_recipes(recipes):
-    """Cache recipe embeddings for faster subsequent searches"""
-    global cached_recipes, recipe_embeddings
-    
+    """
+    Cache recipe embeddings for faster subsequent searches; returns the recipes and their embeddings
+    """
     if not recipes:
-        return
+        return [], None
         
     # Store recipes
-    cached_recipes = recipes
+    recipes = to_recipes(recipes)
+    ingredient_index.add(recipes)
     
     # Create recipe texts for embedding
-    recipe_texts = [
-        f"{recipe['name']} {' '.join(recipe['ingredients'])}"
-        for recipe in recipes
-    ]
+    recipe_texts = [recipe.embedding_text for recipe in recipes]
     
-    # Generate embeddings
-    recipe_embeddings = model.encode(recipe_texts, convert_to_tensor=True)
+    # Generate embeddings, encoding only texts we have not seen before
+    vectors = embedding_cache.encode(recipe_texts, encode_texts)
+    embeddings = torch.from_numpy(vectors).to(model.device)
+    recipe_retriever.add(recipes, vectors)
+    return recipes, embeddings
 
-def semantic_search(query, recipes, top_k=4):
-    """Search recipes using transformer embeddings"""
-    if not recipes or recipe_embeddings is None:
+def semantic_search(query, recipes, embeddings, top_k=4):
+    """Search recipes using their transformer embeddings"""
+    if not recipes or embeddings is None or len(recipes) != len(embeddings):
         return []
 
     # Generate query embedding
@@ -65,7 +127,7 @@ def semantic_search(query, recipes, top_k=4):
     # Calculate cosine similarities
     # Normalize the embeddings
     query_embedding = query_embedding / query_embedding.norm(dim=0, keepdim=True)
-    normalized_recipe_embeddings = recipe_embeddings / recipe_embeddings.norm(dim=1, keepdim=True)
+    normalized_recipe_embeddings = embeddings / embeddings.norm(dim=1, keepdim=True)
     
     # Calculate dot product (cosine similarity with normalized vectors)
     cos_scores = torch.matmul(query_embedding, normalized_recipe_embeddings.T)
@@ -75,8 +137,16 @@ def semantic_search(query, recipes, top_k=4):
     
     return [recipes[idx] for idx in top_results.indices]
 
-def is_food_related(word, threshold=0.4):
+FOOD_SIMILARITY_THRESHOLD = 0.4
+
+def is_food_related(word, threshold=FOOD_SIMILARITY_THRESHOLD):
     """Check if a word is food-related using semantic similarity"""
+    word = word.strip().lower()
+    if threshold == FOOD_SIMILARITY_THRESHOLD:
+        cached = food_verdicts.get(word)
+        if cached is not None:
+            return cached
+    
     # Common food categories to compare against
     food_categories = [
         "food", "ingredient", "vegetable", "fruit", "meat", "spice", 
@@ -95,7 +165,22 @@ def is_food_related(word, threshold=0.4):
     similarities = torch.matmul(word_embedding, category_embeddings.T)
     
     # Return True if the word is similar enough to any food category
-    return torch.max(similarities).item() > threshold
+    verdict = torch.max(similarities).item() > threshold
+    if threshold == FOOD_SIMILARITY_THRESHOLD:
+        food_verdicts.update({word: verdict}, source=EMBEDDING)
+    return verdict
+
+def classify_food_words(words):
+    """
+    Classify words by cached verdicts, then embeddings
+
+    Only used once LLM understanding has failed or been shed, so the LLM is not asked again.
+    """
+    verdicts = check_food_relevance_batch(words, ask_llm=False)
+    for word, verdict in verdicts.items():
+        if verdict is None:
+            verdicts[word] = is_food_related(word)
+    return verdicts
 
 def extract_excluded_ingredients(query):
     """Extract ingredients that should be excluded from the recipe using Llama 3"""
@@ -166,17 +251,59 @@ def extract_excluded_ingredients(query):
     logger.debug(f"Found excluded ingredients: {expanded_excluded}")
     return list(expanded_excluded)
 
-def process_query(query, number=3):
+def pantry_search(query, number=3):
+    """Rank locally indexed recipes by coverage of the ingredients in the query"""
+    pantry = parse_pantry(query)
+    if not pantry:
+        return []
+    
+    start = time.perf_counter()
+    matches = ingredient_index.match(pantry, number)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Pantry search for {[sorted(item) for item in pantry]} over {len(ingredient_index)} recipes "
+                f"returned {len(matches)} matches in {elapsed_ms:.2f}ms")
+    for recipe, covered, missing in matches:
+        logger.debug(f"{recipe.name}: covers {covered}/{len(pantry)} items, {missing} missing ingredients")
+    
+    return [recipe for recipe, _, _ in matches]
+
+def process_query(query, number=3, mode='default', priority=INTERACTIVE):
     """
     Process user query and enhance with semantic search using Llama 3
     """
+    results, _, _ = rank_query(query, number, mode, priority)
+    if isinstance(results, dict):
+        return results
+    return results[:number]
+
+@profiler.profiled
+def rank_query(query, number=3, mode='default', priority=INTERACTIVE, progress=None, deadline=None):
+    """
+    Rank every candidate for a query, reporting each stage to the optional progress callback
+
+    Stage queues wait no longer than the request's deadline (see search_deadline) allows.
+
+    Returns (ranked recipes or error dict, search query, whether the API may have more).
+    """
+    progress = progress or (lambda message: None)
     query_original = query
     query = query.lower().strip()
     
+    if priority == INTERACTIVE:
+        query_tracker.record(query)
+    
+    if mode == 'pantry':
+        results = pantry_search(query, max(number, LOCAL_RESULTS_DEPTH))
+        if results:
+            return results, query, False
+        logger.info("No pantry matches in the local index, falling back to recipe search")
+    
     keywords = []
     search_query = query
     
-    llm_understanding = llm_understand_query(query)
+    progress("Understanding your request")
+    with stage_limits['llm'].admit(deadline=deadline) as admitted:
+        llm_understanding = llm_understand_query(query) if admitted else None
     
     if llm_understanding:
         logger.info("Using LLM-powered query understanding")
@@ -218,13 +345,13 @@ def process_query(query, number=3):
             'the', 'and', 'or', 'but', 'to', 'that', 'this', 'these', 'those', 'fill'
         }
         
-        words = query.split()
+        words = [word for word in query.split() if len(word) > 2 and word not in common_words]
+        verdicts = classify_food_words(words)
         
         for word in words:
-            if len(word) > 2 and word not in common_words:
-                if is_food_related(word):
-                    keywords.append(word)
-                    logger.debug(f"Found food-related word: {word}")
+            if verdicts.get(word):
+                keywords.append(word)
+                logger.debug(f"Found food-related word: {word}")
         
         has_health_terms = any(term in query for term in health_terms)
         if has_health_terms:
@@ -233,28 +360,208 @@ def process_query(query, number=3):
         if keywords:
             search_query = ' '.join(keywords)
     
-    logger.info(f"Original query: {query_original}")
+    if priority == INTERACTIVE:
+        logger.info(f"Original query: {query_original}")
+    else:
+        # Kept out of the "Original query" lines that warm-up mines, so warmed queries don't promote themselves
+        logger.debug(f"Warm-up query: {query_original}")
     logger.debug(f"Keywords found: {keywords}")
     logger.debug(f"Search query: {search_query}")
     
-    recipes = search_recipes(query_original, search_query, number)
-    
-    if isinstance(recipes, dict) and recipes.get('error') == 'API_LIMIT_REACHED':
-        return recipes
+    progress(f"Searching recipes for: {search_query}")
+    with stage_limits['api'].admit(deadline=deadline) as admitted:
+        if admitted:
+            recipes = search_recipes(query_original, search_query, number, priority)
+        else:
+            logger.warning("API stage saturated, skipping recipe search")
+            recipes = []
+    
+    if isinstance(recipes, dict):
+        # Paced or out of budget: degrade to the local corpus before giving up
+        if len(recipe_retriever):
+            logger.info("API budget unavailable, answering from the local corpus")
+            local_results = recipe_retriever.search(query, max(number, LOCAL_RESULTS_DEPTH))
+            if local_results:
+                return local_results, search_query, False
+        return recipes, search_query, False
     
     if recipes:
-        cache_recipes(recipes)
-        return semantic_search(query, recipes, number)
+        progress(f"Ranking {len(recipes)} recipes")
+        # A short page means Spoonacular has nothing further for this query
+        return rank_recipes(query, recipes, deadline), search_query, len(recipes) >= number * 2
+    
+    if len(recipe_retriever):
+        logger.info(f"No fresh results, answering from the local corpus of {len(recipe_retriever)} recipes")
+        return recipe_retriever.search(query, max(number, LOCAL_RESULTS_DEPTH)), search_query, False
     
-    if cached_recipes:
-        return semantic_search(query, cached_recipes, number)
+    return [], search_query, False
+
+def rank_recipes(query, recipes, deadline=None):
+    """Cache freshly fetched recipes and rank all of them against the query"""
+    with stage_limits['encode'].admit(deadline=deadline) as admitted:
+        if not admitted:
+            logger.warning("Encode stage saturated, returning unranked results")
+            return to_recipes(recipes)
+        recipes, embeddings = cache_recipes(recipes)
+        return semantic_search(query, recipes, embeddings, len(recipes))
+
+def paginated_query(query, number=3, mode='default', progress=None, deadline=None):
+    """
+    Run a search and keep its ranked candidates under a cursor; returns (page, cursor token or None)
+    """
+    ranked, search_query, more_upstream = rank_query(query, number, mode, progress=progress, deadline=deadline)
+    if isinstance(ranked, dict):
+        return ranked, None
+    
+    cursor = SearchCursor(query.lower().strip(), query, search_query, ranked,
+                          api_offset=number * 2, exhausted=not more_upstream)
+    page = cursor.take(number)
+    token = cursor_store.create(cursor) if cursor.has_more else None
+    return page, token
+
+def next_page(token, number=3, deadline=None):
+    """
+    Serve the next page of a cursor, fetching further upstream results only once candidates run out
+    
+    Returns (page, token or None), or (None, None) if the cursor is unknown or expired.
+    """
+    cursor = cursor_store.get(token)
+    if cursor is None:
+        return None, None
+    
+    with cursor.lock:
+        while cursor.remaining < number and not cursor.exhausted:
+            with stage_limits['api'].admit(deadline=deadline) as admitted:
+                if not admitted:
+                    break
+                fetched = search_recipes(cursor.query_original, cursor.search_query, number,
+                                         offset=cursor.api_offset, keyword_fallback=False)
+            if isinstance(fetched, dict) and fetched.get('error') == 'API_BUSY':
+                # Only paced: keep the cursor so the client can ask again later
+                if not cursor.remaining:
+                    return fetched, token
+                break
+            if isinstance(fetched, dict) or not fetched:
+                cursor.exhausted = True
+                break
+            cursor.api_offset += number * 2
+            added = cursor.extend(rank_recipes(cursor.query, fetched, deadline))
+            if not added or len(fetched) < number * 2:
+                cursor.exhausted = True
+        
+        page = cursor.take(number)
+        return page, (token if cursor.has_more else None)
+
+def recipes_response(recipes, **extra):
+    """Build a /search response from the recipes' pre-serialized JSON fragments"""
+    fields = ''.join(f', {json.dumps(key)}: {json.dumps(value)}' for key, value in extra.items())
+    body = f'{{"rate_limited": false{fields}, "results": [{", ".join(recipe.to_json() for recipe in recipes)}]}}'
+    return app.response_class(body, mimetype='application/json')
+
+def overloaded_response(query, number=3):
+    """Shed a request: answer from the local corpus without model inference, or ask the client to retry"""
+    results = recipe_retriever.search(query, number, lexical_only=True)
+    if results:
+        logger.warning("Search saturated, serving cache-only answer")
+        return recipes_response(results, degraded=True)
+    
+    logger.warning("Search saturated, shedding request")
+    return busy_response()
+
+def api_error_response(error):
+    """429 for a search the Spoonacular budget could not serve, distinguishing pacing from exhaustion"""
+    retry_after = quota.wait_time(INTERACTIVE) if error.get('error') == 'API_BUSY' else None
+    if retry_after is None:
+        return jsonify({
+            'error': 'Daily API limit reached. Please try again tomorrow.',
+            'api_limited': True
+        }), 429
     
-    return []
+    retry_after = max(1, math.ceil(retry_after))
+    response = jsonify({
+        'error': 'Recipe searches are being paced right now. Please try again shortly.',
+        'api_busy': True,
+        'retry_after': retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def busy_response():
+    """503 asking the client to retry once the search queue has drained"""
+    response = jsonify({
+        'error': 'The server is busy. Please try again in a moment.',
+        'overloaded': True
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(search_admission.retry_after())
+    return response
 
 @app.route('/')
 def home():
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics():
+    return jsonify({
+        'quota': quota.forecast(),
+        'llm': llm_client.metrics(),
+        'embedding_cache': embedding_cache.stats(),
+        'threads': thread_settings,
+        'admission': {
+            'search': search_admission.snapshot(),
+            **{stage: limiter.snapshot() for stage, limiter in stage_limits.items()}
+        }
+    })
+
+def admin_authorized():
+    """Check the X-Admin-Token header against ADMIN_TOKEN"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """
+    Report profiling results; POST action=start|stop|toggle to switch profiling at runtime
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Not found'}), 404
+
+    if request.method == 'GET':
+        return jsonify(profiler.report())
+
+    action = request.form.get('action', 'toggle')
+    if action == 'start':
+        profiler.enable()
+        return jsonify(profiler.report())
+    if action == 'stop':
+        report = profiler.disable()
+        profiler.log_report(report)
+        return jsonify(report)
+    if action == 'toggle':
+        profiler.toggle()
+        return jsonify(profiler.report())
+    return jsonify({'error': f'Unknown action: {action}'}), 400
+
+@app.route('/admin/warmup', methods=['GET', 'POST'])
+def admin_warmup():
+    """
+    Report the warm-up job; POST starts a run in the background, sharing this server's caches and quota
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Not found'}), 404
+
+    started = warmup.start() if request.method == 'POST' else False
+    if started:
+        logger.info("Cache warm-up started on request")
+    return jsonify({
+        'started': started,
+        'running': warmup.running,
+        'last_run': warmup.last_run.isoformat() if warmup.last_run else None,
+        'last_warmed': warmup.last_warmed,
+        'quota': quota.forecast()
+    }), 202 if started else 200
+
 @app.route('/search', methods=['POST'])
 def search():
     ip = request.remote_addr
@@ -264,7 +571,30 @@ def search():
             'rate_limited': True
         }), 429
 
+    deadline = search_deadline()
+    cursor = request.form.get('cursor')
+    if cursor:
+        with search_admission.admit(deadline=deadline) as admitted:
+            if not admitted:
+                logger.warning("Search saturated, shedding request for more results")
+                return busy_response()
+            results, next_cursor = next_page(cursor, deadline=deadline)
+        if results is None:
+            return jsonify({
+                'error': 'These results have expired. Please search again.',
+                'cursor_expired': True
+            }), 410
+        if isinstance(results, dict):
+            return api_error_response(results)
+        return recipes_response(results, cursor=next_cursor, has_more=next_cursor is not None)
+
     query = request.form['query']
+    mode = request.form.get('mode', 'default')
+    if mode not in SEARCH_MODES:
+        return jsonify({
+            'error': f'Invalid search mode: {mode}',
+            'invalid_mode': True
+        }), 400
     
     try:
         validate_input(query, ip)
@@ -275,104 +605,26 @@ def search():
             'guardrail_violation': True
         }), 400
     
-    results = process_query(query)
+    with search_admission.admit(deadline=deadline) as admitted:
+        if not admitted:
+            return overloaded_response(query)
+        results, next_cursor = paginated_query(query, mode=mode, deadline=deadline)
 
     # Check API limit
-    if isinstance(results, dict) and results.get('error') == 'API_LIMIT_REACHED':
-        return jsonify({
-            'error': 'Daily API limit reached. Please try again tomorrow.',
-            'api_limited': True
-        }), 429
-
-    return jsonify({
-        'rate_limited': False,
-        'results': [{
-            'name': recipe['name'],
-            'ingredients': ', '.join(recipe['ingredients']),
-            'steps': recipe['steps'],
-            'readyInMinutes': recipe['readyInMinutes'],
-            'servings': recipe['servings'],
-            'sourceUrl': recipe['sourceUrl']
-        } for recipe in results]
-    })
-
-def chat():
-    welcome_message = """
-    Hello! I'm Local Flavor Bot! 🍳👨‍🍳👩‍🍳
-
-    I'm your personal culinary assistant, ready to help you discover delicious recipes based on your ingredients or cravings.
-
-    How can I assist you today?
-    """
-    logger.info("Starting chat session")
-    print(welcome_message)
-
-    exit_commands = [
-        "exit", "quit", "bye", "goodbye", "see you later",
-        "leave", "end chat", "stop", "close", "finish"
-    ]
-
-    while True:
-        query = input("You: ")
-        if query.lower() in exit_commands:
-            logger.info("Chat session ended by user")
-            print("Bot: See you later!")
-            break
-        
-        logger.info(f"User query: {query}")
-        
-        try:
-            validate_input(query)
-        except GuardrailViolation as e:
-            logger.warning(f"Guardrail violation in CLI: {str(e)}")
-            print(f"\nBot: I'm sorry, but that query is not valid. {str(e)}")
-            continue
-        
-        results = process_query(query)
-
-        # Check the API limit
-        if isinstance(results, dict) and results.get('error') == 'API_LIMIT_REACHED':
-            logger.warning("API limit reached during chat session")
-            print("\nBot: I'm sorry, we've reached our daily API limit. Please try again tomorrow!")
-            continue
-
-        if results:
-            logger.info(f"Found {len(results)} recipes for query: {query}")
-            print("\nBot: Here are some recipes that might interest you:")
-            for i, recipe in enumerate(results, 1):
-                print("\n" + "=" * 20)
-                print(f"📝 Recipe #{i}: {recipe['name']}")
-                print("=" * 20)
-            
-                print(f"⏲️  Preparation Details:")
-                print(f"   • Ready in: {recipe['readyInMinutes']} minutes")
-                print(f"   • Servings: {recipe['servings']}")
-                
-                print(f"\n🧂 Ingredients:")
-                for ingredient in recipe['ingredients']:
-                    print(f"   • {ingredient}")
-                
-                print(f"\n📋 Instructions:")
-                if isinstance(recipe['steps'], list):
-                    for step_num, step in enumerate(recipe['steps'], 1):
-                        if isinstance(step, dict) and 'step' in step:
-                            print(f"   {step_num}. {step['step']}")
-                        elif isinstance(step, str):
-                            print(f"   {step_num}. {step}")
-                else:
-                    print(f"   {recipe['steps']}")
-                
-                print(f"\n🔗 Source URL: {recipe['sourceUrl']}")
-                print("=" * 20)
-        else:
-            logger.warning(f"No recipes found for query: {query}")
-            print("\nBot: I'm sorry, I couldn't find any matching recipes. Can you try rephrasing your request?")
+    if isinstance(results, dict):
+        return api_error_response(results)
 
+    return recipes_response(results, cursor=next_cursor, has_more=next_cursor is not None)
 
 def run_flask():
     """
     Run the Flask application
     """
+    mined = query_tracker.mine_logs()
+    logger.info(f"Mined {mined} queries from recent logs for warm-up")
+    if WARMUP_SCHEDULER:
+        start_warmup_scheduler(warmup)
+    install_signal_handler(profiler)
     logger.info("Starting web interface on http://localhost:5001")
     app.run(debug=False, use_reloader=False, host='0.0.0.0', port=5001)
 
@@ -380,8 +632,10 @@ def run_cli():
     """
     Run the CLI interface
     """
+    from src.components.client import chat
+    from src.components.daemon import handle_request
     logger.info("Starting CLI interface")
-    chat()
+    chat(handle_request)
 
 def run_app():
     """
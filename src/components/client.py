@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import socket
+import argparse
+import tempfile
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Dict, Iterator, Optional
+from dotenv import load_dotenv
+
+# Nothing heavier than the standard library and dotenv here, so the CLI starts without loading torch
+load_dotenv()
+
+_default_socket = f"flavor-bot-{os.getuid()}.sock" if hasattr(os, 'getuid') else 'flavor-bot.sock'
+DAEMON_SOCKET = os.getenv('FLAVOR_BOT_SOCKET', os.path.join(tempfile.gettempdir(), _default_socket))
+DAEMON_CONNECT_TIMEOUT = 0.5
+# Web server that `main.py --warmup` asks to warm its caches
+SERVER_URL = os.getenv('FLAVOR_BOT_URL', 'http://localhost:5001')
+
+Event = Dict[str, Any]
+Transport = Callable[[Dict[str, Any]], Iterator[Event]]
+
+EXIT_COMMANDS = [
+    "exit", "quit", "bye", "goodbye", "see you later",
+    "leave", "end chat", "stop", "close", "finish"
+]
+MORE_COMMANDS = ["more", "show more", "next"]
+
+WELCOME_MESSAGE = """
+    Hello! I'm Local Flavor Bot! 🍳👨‍🍳👩‍🍳
+
+    I'm your personal culinary assistant, ready to help you discover delicious recipes based on your ingredients or cravings.
+
+    How can I assist you today?
+    """
+
+class DaemonUnavailable(Exception):
+    """Raised when no daemon is listening on the socket"""
+    pass
+
+def daemon_request(request: Dict[str, Any], path: str = DAEMON_SOCKET) -> Iterator[Event]:
+    """
+    Send one request to the daemon and yield its newline-delimited JSON events as they arrive
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+        sock.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as e:
+        sock.close()
+        raise DaemonUnavailable(str(e))
+
+    with sock:
+        sock.settimeout(None)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('r', encoding='utf-8') as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+def daemon_running(path: str = DAEMON_SOCKET) -> bool:
+    """Check whether a daemon answers on the socket"""
+    try:
+        return any(event.get('event') == 'pong' for event in daemon_request({'op': 'ping'}, path))
+    except (DaemonUnavailable, OSError, ValueError):
+        return False
+
+def local_transport() -> Transport:
+    """
+    Serve requests in this process, loading the models (the slow path when no daemon is running)
+    """
+    from src.components.threads import configure_threads
+    configure_threads('cli')
+    from src.components.daemon import handle_request
+    return handle_request
+
+def print_recipe(number: int, recipe: Dict[str, Any]) -> None:
+    print("\n" + "=" * 20)
+    print(f"📝 Recipe #{number}: {recipe['name']}")
+    print("=" * 20)
+
+    print(f"⏲️  Preparation Details:")
+    print(f"   • Ready in: {recipe['readyInMinutes']} minutes")
+    print(f"   • Servings: {recipe['servings']}")
+
+    print(f"\n🧂 Ingredients:")
+    for ingredient in recipe['ingredients']:
+        print(f"   • {ingredient}")
+
+    print(f"\n📋 Instructions:")
+    for step_num, step in enumerate(recipe['steps'], 1):
+        print(f"   {step_num}. {step}")
+
+    print(f"\n🔗 Source URL: {recipe['sourceUrl']}")
+    print("=" * 20)
+
+def show_events(events: Iterator[Event], first_number: int = 1, more: bool = False) -> Event:
+    """
+    Print events as they stream in; returns the final done or error event
+    """
+    shown = 0
+    for event in events:
+        kind = event.get('event')
+        if kind == 'status':
+            print(f"   … {event['message']}")
+        elif kind == 'recipe':
+            if not shown:
+                print("\nBot: Here are some more recipes:" if more
+                      else "\nBot: Here are some recipes that might interest you:")
+            print_recipe(first_number + shown, event['recipe'])
+            shown += 1
+        elif kind == 'error':
+            print(f"\nBot: {event['message']}")
+            return event
+        elif kind == 'done':
+            if not shown:
+                print("\nBot: That's all the recipes I have for this search!" if more
+                      else "\nBot: I'm sorry, I couldn't find any matching recipes. Can you try rephrasing your request?")
+            elif event.get('has_more'):
+                print("\nBot: Type 'more' to see more recipes.")
+            return event
+    return {'event': 'error', 'error': 'disconnected', 'message': "I lost the connection to the recipe service."}
+
+def chat(send: Transport) -> None:
+    """
+    Interactive chat loop over a transport (the daemon socket or in-process)
+    """
+    print(WELCOME_MESSAGE)
+
+    cursor = None
+    shown = 0
+
+    while True:
+        try:
+            query = input("You: ")
+        except EOFError:
+            break
+        if query.lower() in EXIT_COMMANDS:
+            print("Bot: See you later!")
+            break
+
+        more = query.lower().strip() in MORE_COMMANDS
+        if more:
+            if cursor is None:
+                print("\nBot: There are no more results for that search. What else would you like to cook?")
+                continue
+            request = {'op': 'more', 'cursor': cursor}
+        else:
+            request = {'op': 'search', 'query': query}
+            shown = 0
+
+        try:
+            result = show_events(send(request), shown + 1, more)
+        except (DaemonUnavailable, OSError, ValueError) as e:
+            print(f"\nBot: I lost the connection to the recipe service ({e}).")
+            continue
+
+        cursor = result.get('cursor')
+        shown += result.get('count', 0)
+
+def run_client(argv: Optional[list] = None) -> int:
+    """
+    Entry point for `main.py --cli`: use a running daemon if there is one, otherwise work in-process
+    """
+    parser = argparse.ArgumentParser(prog='main.py --cli', description='Chat with Flavor Bot from the terminal.')
+    parser.add_argument('-q', '--query', help='answer a single query and exit')
+    parser.add_argument('--more', metavar='CURSOR', help='print the next page of an earlier one-shot query')
+    parser.add_argument('--mode', default='default', choices=['default', 'pantry'], help='search mode')
+    parser.add_argument('-n', '--number', type=int, default=3, help='recipes per page')
+    parser.add_argument('--json', action='store_true', help='print raw newline-delimited JSON events')
+    parser.add_argument('--socket', default=DAEMON_SOCKET, help='daemon socket path')
+    parser.add_argument('--no-daemon', action='store_true', help='always run in-process')
+    args = parser.parse_args(argv)
+
+    use_daemon = not args.no_daemon and daemon_running(args.socket)
+    if use_daemon:
+        send = lambda request: daemon_request(request, args.socket)
+    else:
+        send = local_transport()
+
+    if args.query is None and args.more is None:
+        chat(send)
+        return 0
+
+    if args.more:
+        request = {'op': 'more', 'cursor': args.more, 'number': args.number}
+    else:
+        request = {'op': 'search', 'query': args.query, 'mode': args.mode, 'number': args.number}
+
+    if args.json:
+        result = {}
+        for event in send(request):
+            print(json.dumps(event), flush=True)
+            result = event
+    else:
+        result = show_events(send(request), more=bool(args.more))
+        # Cursors only outlive this command when a daemon holds them
+        if use_daemon and result.get('cursor'):
+            print(f"\nMore results: python main.py --cli --more {result['cursor']}")
+    return 1 if result.get('event') != 'done' else 0
+
+def run_warmup_client(argv: Optional[list] = None) -> int:
+    """
+    Entry point for `main.py --warmup`: start a warm-up in the running web server
+
+    The warm-up runs inside the server so the caches it fills and the API calls it makes
+    belong to the process that serves searches.
+    """
+    parser = argparse.ArgumentParser(prog='main.py --warmup', description="Warm the web server's caches.")
+    parser.add_argument('--url', default=SERVER_URL, help='web server URL')
+    args = parser.parse_args(argv)
+
+    token = os.getenv('ADMIN_TOKEN')
+    if not token:
+        print("ADMIN_TOKEN must be set to trigger a warm-up", file=sys.stderr)
+        return 1
+
+    request = urllib.request.Request(f"{args.url.rstrip('/')}/admin/warmup", data=b'', method='POST',
+                                     headers={'X-Admin-Token': token})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            status = json.load(response)
+    except urllib.error.HTTPError as e:
+        print(f"Warm-up request rejected ({e.code}); check ADMIN_TOKEN", file=sys.stderr)
+        return 1
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        print(f"No Flavor Bot server reachable at {args.url} ({e}); start it with `python main.py`", file=sys.stderr)
+        return 1
+
+    if status['started']:
+        print("Warm-up started in the web server; progress is in its log")
+    else:
+        print("A warm-up is already running in the web server")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(run_client())
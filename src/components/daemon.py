@@ -0,0 +1,180 @@
+import os
+import json
+import math
+import queue
+import signal
+import socket
+import threading
+import socketserver
+from typing import Any, Dict, Iterator, Optional
+from src.components.app import paginated_query, next_page, SEARCH_MODES
+from src.components.admission import search_admission, search_deadline
+from src.components.api import quota
+from src.components.client import DAEMON_SOCKET, DAEMON_CONNECT_TIMEOUT, Event
+from src.components.llm import validate_input, GuardrailViolation
+from src.components.profiling import profiler, install_signal_handler
+from src.components.scheduler import INTERACTIVE
+from src.logger import setup_logger
+
+logger = setup_logger()
+
+MAX_NUMBER = 20
+
+def _error(error: str, message: str) -> Event:
+    return {'event': 'error', 'error': error, 'message': message}
+
+def _page_events(page, cursor, start_number: int = 1) -> Iterator[Event]:
+    if isinstance(page, dict):
+        retry_after = quota.wait_time(INTERACTIVE) if page.get('error') == 'API_BUSY' else None
+        if retry_after is None:
+            yield _error('api_limited', "I'm sorry, we've reached our daily API limit. Please try again tomorrow!")
+        else:
+            yield {**_error('api_busy', "Recipe searches are being paced right now. Please try again shortly."),
+                   'retry_after': max(1, math.ceil(retry_after)), 'cursor': cursor}
+        return
+    for i, recipe in enumerate(page, start_number):
+        yield {'event': 'recipe', 'rank': i, 'recipe': recipe.to_dict()}
+    yield {'event': 'done', 'count': len(page), 'cursor': cursor, 'has_more': cursor is not None}
+
+def _search_events(query: str, number: int, mode: str, deadline: Optional[float] = None) -> Iterator[Event]:
+    """
+    Run a search on a worker thread, streaming its stage updates and then each ranked recipe
+    """
+    events = queue.Queue()
+    outcome = {}
+
+    def work():
+        try:
+            outcome['result'] = paginated_query(query, number, mode,
+                                                progress=lambda message: events.put({'event': 'status', 'message': message}),
+                                                deadline=deadline)
+        except Exception as e:
+            logger.error(f"Daemon search failed: {e}")
+            outcome['error'] = e
+        finally:
+            events.put(None)
+
+    threading.Thread(target=work, name='daemon-search', daemon=True).start()
+    while True:
+        event = events.get()
+        if event is None:
+            break
+        yield event
+
+    if 'error' in outcome:
+        yield _error('internal', "Something went wrong while searching. Please try again.")
+        return
+    yield from _page_events(*outcome['result'])
+
+def handle_request(request: Dict[str, Any], deadline: Optional[float] = None) -> Iterator[Event]:
+    """
+    Answer one client request with a stream of events ending in 'done' or 'error'
+    """
+    op = request.get('op')
+    if op == 'ping':
+        yield {'event': 'pong', 'pid': os.getpid()}
+        return
+
+    number = request.get('number', 3)
+    if not isinstance(number, int) or not 1 <= number <= MAX_NUMBER:
+        yield _error('invalid', f"number must be between 1 and {MAX_NUMBER}")
+        return
+
+    if op == 'more':
+        page, cursor = next_page(str(request.get('cursor', '')), number, deadline)
+        if page is None:
+            yield _error('cursor_expired', "Those results have expired. Please search again.")
+            return
+        yield from _page_events(page, cursor)
+        return
+
+    if op != 'search':
+        yield _error('invalid', f"Unknown request: {op}")
+        return
+
+    query = str(request.get('query', ''))
+    mode = request.get('mode', 'default')
+    if mode not in SEARCH_MODES:
+        yield _error('invalid', f"Invalid search mode: {mode}")
+        return
+
+    logger.info(f"User query: {query}")
+    try:
+        validate_input(query)
+    except GuardrailViolation as e:
+        logger.warning(f"Guardrail violation in CLI: {str(e)}")
+        yield _error('guardrail_violation', f"I'm sorry, but that query is not valid. {str(e)}")
+        return
+
+    yield from _search_events(query, number, mode, deadline)
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    """
+    One request per connection: a JSON line in, newline-delimited JSON events out
+    """
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self._send(_error('invalid', "Requests must be a single line of JSON"))
+            return
+
+        deadline = search_deadline()
+        with search_admission.admit(deadline=deadline) as admitted:
+            if not admitted and request.get('op') != 'ping':
+                self._send(_error('overloaded', "The kitchen is busy right now. Please try again in a moment."))
+                return
+            try:
+                for event in handle_request(request, deadline):
+                    self._send(event)
+            except (BrokenPipeError, ConnectionResetError):
+                logger.debug("CLI client disconnected mid-stream")
+
+    def _send(self, event: Event) -> None:
+        self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def _remove_stale_socket(path: str) -> None:
+    """
+    Delete a socket file left behind by a dead daemon; refuse to start if one is still alive
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(DAEMON_CONNECT_TIMEOUT)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A Flavor Bot daemon is already listening on {path}")
+
+def run_daemon(path: str = DAEMON_SOCKET) -> None:
+    """
+    Keep the models and caches loaded and serve CLI clients over a Unix socket until interrupted
+    """
+    _remove_stale_socket(path)
+    server = DaemonServer(path, DaemonHandler)
+    os.chmod(path, 0o600)
+
+    try:
+        if threading.current_thread() is threading.main_thread():
+            # Let SIGTERM shut down as cleanly as Ctrl+C
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+            install_signal_handler(profiler)
+
+        logger.info(f"Flavor Bot daemon listening on {path}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        logger.info("Flavor Bot daemon stopped")
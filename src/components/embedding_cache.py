@@ -0,0 +1,248 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+from src.logger import setup_logger
+
+# POSIX file locking; without it the cache assumes a single process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = setup_logger()
+
+# Embedding cache storage
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', os.path.join(os.getcwd(), 'data', 'embedding_cache'))
+EMBEDDING_CACHE_CAPACITY = int(os.getenv('EMBEDDING_CACHE_CAPACITY', '50000'))
+VECTORS_FILE = 'vectors.npy'
+INDEX_FILE = 'index.json'
+JOURNAL_FILE = 'index.log'
+LOCK_FILE = 'lock'
+# Journal entries appended before they are folded back into the index
+JOURNAL_COMPACT_ENTRIES = 5000
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by a hash of the exact text and model, stored as a memory-mapped float16 matrix
+
+    Rows are evicted least recently used first. Each row carries a checksum, and the whole cache
+    is discarded when the model, dimension or capacity no longer match what is on disk.
+    New rows are appended to a journal and folded into the index only occasionally.
+
+    One process at a time owns the directory through a file lock; any other process that opens
+    it (say the daemon next to the web server) keeps its cache in memory instead of persisting it.
+    """
+    def __init__(self, model_id: str, dim: int, directory: str = EMBEDDING_CACHE_DIR,
+                 capacity: int = EMBEDDING_CACHE_CAPACITY):
+        self.model_id = model_id
+        self.dim = dim
+        self.directory = directory
+        self.capacity = capacity
+        self.vectors_path = os.path.join(directory, VECTORS_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self._journal_entries = 0
+        self.hits = 0
+        self.misses = 0
+        # text hash -> (row, checksum), least recently used first
+        self._rows: 'OrderedDict[str, Tuple[int, int]]' = OrderedDict()
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        self._lock_file = None
+        os.makedirs(directory, exist_ok=True)
+        self.persistent = self._claim_directory()
+        if self.persistent:
+            self._open()
+        else:
+            logger.warning(f"Embedding cache in {directory} is in use by another process, "
+                           f"keeping this process's cache in memory")
+            self._vectors = np.zeros((self.capacity, self.dim), dtype=np.float16)
+            self._free = list(range(self.capacity - 1, -1, -1))
+
+    def _claim_directory(self) -> bool:
+        """
+        Take the directory's lock for the life of this process; False if another process holds it
+        """
+        if fcntl is None:
+            return True
+        lock_file = open(os.path.join(self.directory, LOCK_FILE), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _open(self) -> None:
+        """
+        Load the index and matrix, starting over if they were built for something else
+        """
+        meta = None
+        if os.path.exists(self.index_path) and os.path.exists(self.vectors_path):
+            try:
+                with open(self.index_path, encoding='utf-8') as fh:
+                    meta = json.load(fh)
+                self._vectors = np.load(self.vectors_path, mmap_mode='r+')
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embedding cache unreadable, rebuilding: {e}")
+                meta = None
+
+        expected = {'model': self.model_id, 'dim': self.dim, 'capacity': self.capacity}
+        if meta is None or any(meta.get(key) != value for key, value in expected.items()) \
+                or self._vectors.shape != (self.capacity, self.dim):
+            if meta is not None:
+                logger.info(f"Embedding cache was built for {meta.get('model')} "
+                            f"(dim {meta.get('dim')}), rebuilding for {self.model_id}")
+            self._vectors = np.lib.format.open_memmap(
+                self.vectors_path, mode='w+', dtype=np.float16, shape=(self.capacity, self.dim))
+            self._rows.clear()
+            self._free = list(range(self.capacity - 1, -1, -1))
+            self._save_index()
+            return
+
+        for text_hash, row, checksum in meta['rows']:
+            self._rows[text_hash] = (row, checksum)
+        if self._replay_journal():
+            self._save_index()
+        used = {row for row, _ in self._rows.values()}
+        self._free = [row for row in range(self.capacity - 1, -1, -1) if row not in used]
+        logger.info(f"Opened embedding cache with {len(self._rows)} entries")
+
+    def _replay_journal(self) -> int:
+        """
+        Apply journaled rows on top of the index; a row written later replaces whatever held it before
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        owners = {row: text_hash for text_hash, (row, _) in self._rows.items()}
+        replayed = 0
+        with open(self.journal_path, encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    text_hash, row, checksum = line.split()
+                    row, checksum = int(row), int(checksum)
+                except ValueError:
+                    # A torn last line from a crash; the row checksum guards the vector itself
+                    continue
+                if not 0 <= row < self.capacity:
+                    continue
+                previous = owners.get(row)
+                if previous is not None:
+                    self._rows.pop(previous, None)
+                self._rows.pop(text_hash, None)
+                self._rows[text_hash] = (row, checksum)
+                owners[row] = text_hash
+                replayed += 1
+        return replayed
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({
+                'model': self.model_id,
+                'dim': self.dim,
+                'capacity': self.capacity,
+                'rows': [[text_hash, row, checksum] for text_hash, (row, checksum) in self._rows.items()]
+            }, fh)
+        os.replace(tmp_path, self.index_path)
+        # Everything journaled is now in the index
+        open(self.journal_path, 'w').close()
+        self._journal_entries = 0
+
+    def _append_journal(self, entries: List[Tuple[str, int, int]]) -> None:
+        with open(self.journal_path, 'a', encoding='utf-8') as fh:
+            fh.write(''.join(f"{text_hash} {row} {checksum}\n" for text_hash, row, checksum in entries))
+        self._journal_entries += len(entries)
+        if self._journal_entries >= JOURNAL_COMPACT_ENTRIES:
+            self._save_index()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _hash(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def _checksum(vector: np.ndarray) -> int:
+        return zlib.crc32(np.ascontiguousarray(vector).tobytes())
+
+    def _lookup(self, text_hash: str):
+        """Return the cached vector for a hash, dropping it if its checksum does not match"""
+        entry = self._rows.get(text_hash)
+        if entry is None:
+            return None
+        row, checksum = entry
+        vector = np.array(self._vectors[row])
+        if self._checksum(vector) != checksum:
+            logger.warning(f"Embedding cache row {row} failed its integrity check, re-encoding")
+            del self._rows[text_hash]
+            self._free.append(row)
+            return None
+        self._rows.move_to_end(text_hash)
+        return vector
+
+    def _store(self, text_hash: str, vector: np.ndarray):
+        """Write a vector to a free (or evicted) row; returns its journal entry"""
+        if text_hash in self._rows:
+            return None
+        if not self._free:
+            _, (row, _) = self._rows.popitem(last=False)
+            self._free.append(row)
+        row = self._free.pop()
+        stored = vector.astype(np.float16)
+        self._vectors[row] = stored
+        checksum = self._checksum(stored)
+        self._rows[text_hash] = (row, checksum)
+        return text_hash, row, checksum
+
+    def encode(self, texts: List[str], encoder: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for texts, encoding only cache misses in one batch
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        hashes = [self._hash(text) for text in texts]
+        result = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing: Dict[str, List[int]] = OrderedDict()
+
+        with self._lock:
+            for i, text_hash in enumerate(hashes):
+                vector = self._lookup(text_hash)
+                if vector is None:
+                    missing.setdefault(text_hash, []).append(i)
+                else:
+                    result[i] = vector
+            self.hits += len(texts) - sum(len(positions) for positions in missing.values())
+            self.misses += sum(len(positions) for positions in missing.values())
+
+        if not missing:
+            return result
+
+        miss_texts = [texts[positions[0]] for positions in missing.values()]
+        vectors = np.asarray(encoder(miss_texts), dtype=np.float32)
+
+        with self._lock:
+            entries = []
+            for (text_hash, positions), vector in zip(missing.items(), vectors):
+                result[positions] = vector
+                entry = self._store(text_hash, vector)
+                if entry is not None:
+                    entries.append(entry)
+            if self.persistent:
+                self._vectors.flush()
+                if entries:
+                    self._append_journal(entries)
+
+        logger.debug(f"Embedding cache: {len(texts) - len(miss_texts)} hits, encoded {len(miss_texts)} texts")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._rows), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses,
+                'persistent': self.persistent}
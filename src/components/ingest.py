@@ -0,0 +1,303 @@
+import os
+import re
+import csv
+import json
+import time
+import argparse
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from src.components.recipe import Recipe, iter_records, write_records
+from src.components.threads import configure_threads
+from src.logger import setup_logger
+
+logger = setup_logger()
+
+# main.py --ingest runs without the app, so read .env here too
+load_dotenv()
+
+# Sentence-transformer used for every recipe embedding
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Local corpus storage
+CORPUS_DIR = os.getenv('CORPUS_DIR', os.path.join(os.getcwd(), 'data', 'corpus'))
+EMBEDDINGS_FILE = 'embeddings.npy'
+RECORDS_FILE = 'recipes.bin'
+STATE_FILE = 'state.json'
+
+DEFAULT_BATCH_SIZE = 512
+INITIAL_CAPACITY = 4096
+
+_LIST_SPLIT_PATTERN = re.compile(r'\r?\n|\|')
+
+def _as_list(value: Any) -> List[str]:
+    """Coerce a list-ish dump field (list, JSON list string or delimited text) into strings"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith('['):
+            try:
+                value = json.loads(text)
+            except json.JSONDecodeError:
+                value = _LIST_SPLIT_PATTERN.split(text)
+        else:
+            value = _LIST_SPLIT_PATTERN.split(text)
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get('original') or item.get('step') or item.get('name') or ''
+        item = str(item).strip()
+        if item:
+            items.append(item)
+    return items
+
+def _as_int(value: Any) -> int:
+    """Coerce a numeric dump field into an int, defaulting to 0"""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def normalize_record(raw: Dict[str, Any]) -> Optional[Recipe]:
+    """
+    Normalize a dump row into the same shape search_recipes produces
+    """
+    if 'extendedIngredients' in raw or 'analyzedInstructions' in raw:
+        try:
+            return Recipe.from_spoonacular(raw)
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None
+
+    name = (raw.get('name') or raw.get('title') or '').strip()
+    ingredients = _as_list(raw.get('ingredients'))
+    if not name or not ingredients:
+        return None
+
+    return Recipe(
+        name=name,
+        ingredients=ingredients,
+        steps=_as_list(raw.get('steps') or raw.get('instructions') or raw.get('directions')),
+        readyInMinutes=_as_int(raw.get('readyInMinutes') or raw.get('ready_in_minutes') or raw.get('minutes')),
+        servings=_as_int(raw.get('servings')),
+        sourceUrl=raw.get('sourceUrl') or raw.get('source_url') or raw.get('url') or ''
+    )
+
+def read_source(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream raw rows from a JSONL or CSV recipe dump
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as fh:
+            yield from csv.DictReader(fh)
+        return
+
+    with open(path, encoding='utf-8') as fh:
+        for line_number, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                # Keep row numbering stable for resumption
+                yield {}
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed line {line_number} in {path}")
+                yield {}
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most size items"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class CorpusStore:
+    """
+    Append-only recipe corpus: a memory-mapped embedding matrix plus length-prefixed recipe records
+    """
+    def __init__(self, directory: str = CORPUS_DIR, model_name: str = MODEL_NAME):
+        self.directory = directory
+        self.model_name = model_name
+        self.embeddings_path = os.path.join(directory, EMBEDDINGS_FILE)
+        self.records_path = os.path.join(directory, RECORDS_FILE)
+        self.state_path = os.path.join(directory, STATE_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        self.state = self._load_state()
+        if self.state['model'] != model_name:
+            raise ValueError(f"Corpus in {directory} was built with {self.state['model']}, not {model_name}")
+        self._recover()
+        self.keys = {recipe.key for recipe in self.recipes()}
+
+    def _load_state(self) -> Dict[str, Any]:
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as fh:
+                return json.load(fh)
+        return {'model': self.model_name, 'dim': None, 'count': 0, 'records_bytes': 0, 'sources': {}}
+
+    def _save_state(self) -> None:
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(self.state, fh)
+        os.replace(tmp_path, self.state_path)
+
+    def _recover(self) -> None:
+        """
+        Drop anything written after the last committed state, e.g. by an interrupted run
+        """
+        if os.path.exists(self.records_path):
+            with open(self.records_path, 'r+b') as fh:
+                fh.truncate(self.state['records_bytes'])
+
+    def rows_done(self, source: str) -> int:
+        return self.state['sources'].get(os.path.abspath(source), 0)
+
+    def _embeddings_for_write(self, needed: int, dim: int) -> np.memmap:
+        """
+        Open the embedding matrix for writing, growing its capacity when needed
+        """
+        if os.path.exists(self.embeddings_path):
+            matrix = np.load(self.embeddings_path, mmap_mode='r+')
+            if matrix.shape[0] >= needed:
+                return matrix
+            capacity = max(needed, matrix.shape[0] * 2)
+        else:
+            matrix = None
+            capacity = max(needed, INITIAL_CAPACITY)
+
+        tmp_path = self.embeddings_path + '.tmp.npy'
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, dim))
+        if matrix is not None:
+            count = self.state['count']
+            for start in range(0, count, 65536):
+                grown[start:min(start + 65536, count)] = matrix[start:min(start + 65536, count)]
+            del matrix
+        grown.flush()
+        del grown
+        os.replace(tmp_path, self.embeddings_path)
+        return np.load(self.embeddings_path, mmap_mode='r+')
+
+    def append(self, recipes: List[Recipe], vectors: np.ndarray, source: str, rows: int) -> None:
+        """
+        Write a batch and then commit it together with the source position
+        """
+        if recipes:
+            dim = vectors.shape[1]
+            if self.state['dim'] is None:
+                self.state['dim'] = dim
+            elif self.state['dim'] != dim:
+                raise ValueError(f"Embedding dimension {dim} does not match corpus dimension {self.state['dim']}")
+
+            count = self.state['count']
+            matrix = self._embeddings_for_write(count + len(recipes), dim)
+            matrix[count:count + len(recipes)] = vectors
+            matrix.flush()
+            del matrix
+
+            with open(self.records_path, 'ab') as fh:
+                self.state['records_bytes'] += write_records(fh, recipes)
+                fh.flush()
+                os.fsync(fh.fileno())
+
+            self.state['count'] = count + len(recipes)
+            self.keys.update(recipe.key for recipe in recipes)
+
+        self.state['sources'][os.path.abspath(source)] = rows
+        self._save_state()
+
+    def recipes(self) -> List[Recipe]:
+        if not os.path.exists(self.records_path):
+            return []
+        with open(self.records_path, 'rb') as fh:
+            return list(islice(iter_records(fh), self.state['count']))
+
+def load_corpus(directory: str = CORPUS_DIR, model_name: str = MODEL_NAME) -> Tuple[List[Recipe], Optional[np.ndarray]]:
+    """
+    Open an ingested corpus; embeddings are memory-mapped, not copied
+    """
+    state_path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(state_path):
+        return [], None
+
+    with open(state_path, encoding='utf-8') as fh:
+        state = json.load(fh)
+    if state['model'] != model_name or not state['count']:
+        if state['model'] != model_name:
+            logger.warning(f"Ignoring corpus built with {state['model']}, current model is {model_name}")
+        return [], None
+
+    with open(os.path.join(directory, RECORDS_FILE), 'rb') as fh:
+        recipes = list(islice(iter_records(fh), state['count']))
+    embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode='r')[:len(recipes)]
+    logger.info(f"Opened local corpus of {len(recipes)} recipes from {directory}")
+    return recipes, embeddings
+
+def ingest(paths: List[str], directory: str = CORPUS_DIR, batch_size: int = DEFAULT_BATCH_SIZE,
+           workers: int = 1) -> int:
+    """
+    Stream recipe dumps into the local corpus, resuming where earlier runs stopped
+    """
+    from sentence_transformers import SentenceTransformer
+
+    store = CorpusStore(directory)
+    model = SentenceTransformer(MODEL_NAME)
+    pool = model.start_multi_process_pool(['cpu'] * workers) if workers > 1 else None
+
+    def encode(texts):
+        if pool is not None:
+            vectors = model.encode_multi_process(texts, pool, batch_size=64)
+            return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return model.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+
+    total = 0
+    rows_read = 0
+    start = time.perf_counter()
+    try:
+        for path in paths:
+            skip = store.rows_done(path)
+            if skip:
+                logger.info(f"Resuming {path} after {skip} rows")
+            rows = skip
+
+            for batch in _batched(islice(read_source(path), skip, None), batch_size):
+                rows += len(batch)
+                rows_read += len(batch)
+                recipes = []
+                for raw in batch:
+                    recipe = normalize_record(raw) if raw else None
+                    if recipe is not None and recipe.key not in store.keys:
+                        store.keys.add(recipe.key)
+                        recipes.append(recipe)
+
+                vectors = encode([recipe.embedding_text for recipe in recipes]) if recipes else None
+                store.append(recipes, vectors, path, rows)
+                total += len(recipes)
+
+                elapsed = time.perf_counter() - start
+                logger.info(f"{path}: {rows} rows read, {total} recipes added "
+                            f"({rows_read / max(elapsed, 1e-9):.1f} rows/sec)")
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Ingested {total} recipes from {rows_read} rows in {elapsed:.1f}s "
+                f"({rows_read / max(elapsed, 1e-9):.1f} rows/sec), corpus now holds {store.state['count']}")
+    return total
+
+def run_ingest(argv: List[str]) -> None:
+    """
+    Command line entry point for main.py --ingest
+    """
+    parser = argparse.ArgumentParser(prog='main.py --ingest', description='Ingest recipe dumps into the local corpus')
+    parser.add_argument('paths', nargs='+', help='JSONL or CSV recipe dumps')
+    parser.add_argument('--corpus-dir', default=CORPUS_DIR)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=1, help='encode across a process pool')
+    args = parser.parse_args(argv)
+    configure_threads('ingest', workers=args.workers)
+    ingest(args.paths, args.corpus_dir, args.batch_size, args.workers)
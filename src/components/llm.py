@@ -1,10 +1,15 @@
 import os
+import copy
+import atexit
 import json
 import time
-from typing import Dict, List, Optional, Any
-from collections import defaultdict
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Any, Tuple
+from collections import defaultdict, deque
 from dotenv import load_dotenv
 from src.logger import setup_logger
+from src.components.cache import TTLCache
 
 load_dotenv()
 
@@ -17,59 +22,160 @@ MIN_QUERY_LENGTH = 2
 RATE_LIMIT_WINDOW = 60
 RATE_LIMIT_MAX_CALLS = 30
 
+# Per-call deadline and circuit breaker settings for the LLM provider
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '3'))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('LLM_BREAKER_FAILURES', '3'))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv('LLM_BREAKER_SLOW_SECONDS', '2'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+BREAKER_HALF_OPEN_CALLS = 1
+
+# Router mode (LLM_PROVIDER=router): providers in preference order and hedging settings
+LLM_ROUTER_PROVIDERS = os.getenv('LLM_ROUTER_PROVIDERS', 'groq,ollama')
+LLM_HEDGE_DELAY = float(os.getenv('LLM_HEDGE_DELAY', '1.0'))
+LLM_HEDGE_MIN_DELAY = 0.05
+MIN_HEDGE_SAMPLES = 5
+LATENCY_WINDOW = 100
+EWMA_ALPHA = 0.2
+
+# Batched food relevance classification
+FOOD_VERDICT_CACHE = os.getenv('FOOD_VERDICT_CACHE', os.path.join(os.getcwd(), 'data', 'food_verdicts.json'))
+FOOD_VERDICT_FLUSH_INTERVAL = float(os.getenv('FOOD_VERDICT_FLUSH_INTERVAL', '30'))
+RELEVANCE_BATCH_WINDOW = 0.02
+RELEVANCE_BATCH_MAX_WORDS = 50
+
+# Where a food verdict came from; LLM verdicts are trusted over embedding similarity
+LLM = 'llm'
+EMBEDDING = 'embedding'
+VERDICT_SOURCES = (LLM, EMBEDDING)
+
+UNDERSTANDING_CACHE_SIZE = 1024
+UNDERSTANDING_CACHE_TTL = int(os.getenv('UNDERSTANDING_CACHE_TTL', str(24 * 3600)))
+
 llm_request_tracker = defaultdict(list)
 
+# Runs provider calls for hedged requests
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm-hedge')
+
+# Parsed query understanding keyed by normalized query text
+understanding_cache = TTLCache(UNDERSTANDING_CACHE_SIZE, UNDERSTANDING_CACHE_TTL)
+
 class GuardrailViolation(Exception):
 
     pass
 
-class LLMClient:
-    def __init__(self):
+class CircuitBreaker:
+    """
+    Stops calling a failing or slow provider and probes it again after a cool-down
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT,
+                 half_open_calls: int = BREAKER_HALF_OPEN_CALLS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trials_in_flight = 0
+        self.counts = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'short_circuited': 0, 'opened': 0}
+        self.last_latency = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
         """
-        Initialize the LLM client
+        Decide whether a call may go to the provider right now
         """
-        self.provider = LLM_PROVIDER
-        self.client = None
-        self._initialize_client()
-        
-    def _initialize_client(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    self.counts['short_circuited'] += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self.trials_in_flight = 0
+                logger.info("LLM circuit half-open, sending a trial call")
+
+            if self.state == self.HALF_OPEN:
+                if self.trials_in_flight >= self.half_open_calls:
+                    self.counts['short_circuited'] += 1
+                    return False
+                self.trials_in_flight += 1
+
+            self.counts['calls'] += 1
+            return True
+
+    def release_trial(self) -> None:
         """
-        Initialize the LLM client based on the provider
+        Give back a call slot taken by allow() for a call that was never made
         """
-        if self.provider == 'groq' and GROQ_API_KEY:
-            try:
-                from groq import Groq
-                self.client = Groq(api_key=GROQ_API_KEY)
-                logger.info("Initialized Groq client")
-            except ImportError:
-                logger.warning("Groq package not installed, falling back")
-                self.provider = 'none'
-            except Exception as e:
-                logger.error(f"Failed to initialize Groq client: {e}")
-                self.provider = 'none'
-                
-        elif self.provider == 'ollama':
-            try:
-                import ollama
-                self.client = ollama
-                logger.info("Initialized Ollama client")
-            except ImportError:
-                logger.warning("Ollama package not installed, falling back")
-                self.provider = 'none'
-            except Exception as e:
-                logger.error(f"Failed to initialize Ollama client: {e}")
-                self.provider = 'none'
-        else:
-            self.provider = 'none'
-            logger.info("LLM provider disabled or not configured")
-    
-    def is_available(self) -> bool:
+        with self._lock:
+            self.counts['calls'] -= 1
+            if self.state == self.HALF_OPEN and self.trials_in_flight > 0:
+                self.trials_in_flight -= 1
+
+    def record_success(self, latency: float) -> None:
         """
-        Check if the LLM is available
+        Record a completed call; slow calls count as failures
         """
-        return self.provider != 'none' and self.client is not None
-    
-    def _call_groq(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 500) -> str:
+        if latency > self.slow_call_seconds:
+            with self._lock:
+                self.counts['slow_calls'] += 1
+            self.record_failure(latency)
+            return
+
+        with self._lock:
+            self.last_latency = latency
+            self.consecutive_failures = 0
+            if self.state == self.HALF_OPEN:
+                logger.info("LLM circuit closed after successful trial call")
+                self.state = self.CLOSED
+                self.trials_in_flight = 0
+
+    def record_failure(self, latency: Optional[float] = None) -> None:
+        """
+        Record a failed or slow call, opening the circuit when needed
+        """
+        with self._lock:
+            self.last_latency = latency
+            self.counts['failures'] += 1
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"LLM circuit opened after {self.consecutive_failures} consecutive failures")
+                    self.counts['opened'] += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self.trials_in_flight = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'last_latency': round(self.last_latency, 3) if self.last_latency is not None else None,
+                **self.counts
+            }
+
+class GroqProvider:
+    """
+    Hosted Groq chat completions
+    """
+    name = 'groq'
+
+    def __init__(self, timeout: float = LLM_TIMEOUT):
+        from groq import Groq
+        # Retries are left to the circuit breaker instead of stacking up latency
+        self.client = Groq(api_key=GROQ_API_KEY, timeout=timeout, max_retries=0)
+
+    def chat(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 500,
+             timeout: float = LLM_TIMEOUT) -> str:
         """
         Call the Groq LLM
         """
@@ -79,19 +185,43 @@ class LLMClient:
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                top_p=0.9
+                top_p=0.9,
+                timeout=timeout
             )
             return response.choices[0].message.content
         except Exception as e:
             logger.error(f"Groq API error: {e}")
             raise
-    
-    def _call_ollama(self, messages: List[Dict], temperature: float = 0.3) -> str:
+
+class OllamaProvider:
+    """
+    Local Ollama chat
+    """
+    name = 'ollama'
+
+    def __init__(self, timeout: float = LLM_TIMEOUT):
+        import ollama
+        self._ollama = ollama
+        # ollama.Client only takes a timeout at construction, so keep one client per deadline
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.client = self._client(timeout)
+
+    def _client(self, timeout: float):
+        key = round(timeout, 1)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = self._ollama.Client(timeout=key)
+            return client
+
+    def chat(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 500,
+             timeout: float = LLM_TIMEOUT) -> str:
         """
         Call the Ollama LLM
         """
         try:
-            response = self.client.chat(
+            response = self._client(timeout).chat(
                 model="llama3.1:8b",
                 messages=messages,
                 options={
@@ -103,25 +233,262 @@ class LLMClient:
         except Exception as e:
             logger.error(f"Ollama error: {e}")
             raise
-    
-    def call(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 500) -> Optional[str]:
+
+PROVIDERS = {
+    'groq': GroqProvider,
+    'ollama': OllamaProvider
+}
+
+class StubProvider:
+    """
+    Scripted provider for exercising the router without network calls
+    """
+    def __init__(self, name: str, reply: str = '{"ok": true}', latency: float = 0.0, fail: bool = False):
+        self.name = name
+        self.reply = reply
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def chat(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 500,
+             timeout: float = LLM_TIMEOUT) -> str:
+        self.calls += 1
+        time.sleep(min(self.latency, timeout))
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        if self.latency > timeout:
+            raise TimeoutError(f"{self.name} timed out")
+        return self.reply
+
+def _create_provider(name: str, timeout: float):
+    """
+    Create a provider by name, or return None if it cannot be used
+    """
+    if name == 'groq' and not GROQ_API_KEY:
+        logger.warning("GROQ_API_KEY not set, skipping Groq provider")
+        return None
+    if name not in PROVIDERS:
+        logger.warning(f"Unknown LLM provider: {name}")
+        return None
+    try:
+        provider = PROVIDERS[name](timeout)
+        logger.info(f"Initialized {name} provider")
+        return provider
+    except ImportError:
+        logger.warning(f"{name} package not installed, falling back")
+    except Exception as e:
+        logger.error(f"Failed to initialize {name} provider: {e}")
+    return None
+
+class ProviderState:
+    """
+    Circuit breaker plus latency and error EWMAs for one provider
+    """
+    def __init__(self, provider, prior_latency: float = LLM_HEDGE_DELAY):
+        self.provider = provider
+        self.name = provider.name
+        self.breaker = CircuitBreaker()
+        self.latency_ewma = prior_latency
+        self.error_ewma = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.latency_ewma += EWMA_ALPHA * (latency - self.latency_ewma)
+            self.error_ewma += EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_ewma)
+            if ok:
+                self.latencies.append(latency)
+        if ok:
+            self.breaker.record_success(latency)
+        else:
+            self.breaker.record_failure(latency)
+
+    def score(self) -> float:
         """
-        Call the LLM
+        Expected cost of routing a call here; lower is better
         """
-        if not self.is_available():
-            return None
-            
+        return self.latency_ewma * (1 + 4 * self.error_ewma)
+
+    def hedge_delay(self) -> float:
+        """
+        p95 latency of recent successful calls, used before firing a hedged duplicate
+        """
+        with self._lock:
+            if len(self.latencies) < MIN_HEDGE_SAMPLES:
+                return LLM_HEDGE_DELAY
+            ordered = sorted(self.latencies)
+        return max(LLM_HEDGE_MIN_DELAY, ordered[int(0.95 * (len(ordered) - 1))])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'latency_ewma': round(self.latency_ewma, 3),
+            'error_ewma': round(self.error_ewma, 3),
+            'hedge_delay': round(self.hedge_delay(), 3),
+            'circuit': self.breaker.snapshot()
+        }
+
+class LLMClient:
+    def __init__(self, providers: Optional[List[Any]] = None, timeout: float = LLM_TIMEOUT):
+        """
+        Initialize the LLM client
+
+        Providers are objects with a name and a chat(messages, temperature, max_tokens, timeout)
+        method. With more than one provider the client routes and hedges between them.
+        """
+        self.timeout = timeout
+        if providers is None:
+            providers = self._initialize_providers()
+        self.states = [ProviderState(provider) for provider in providers]
+        self.counts = {'hedges': 0, 'hedge_wins': 0}
+        self._counts_lock = threading.Lock()
+
+        if len(self.states) > 1:
+            self.provider = 'router'
+            logger.info(f"LLM router across {[state.name for state in self.states]}")
+        elif self.states:
+            self.provider = self.states[0].name
+        else:
+            self.provider = 'none'
+            logger.info("LLM provider disabled or not configured")
+
+    def _initialize_providers(self) -> List[Any]:
+        """
+        Initialize the providers named by LLM_PROVIDER (or LLM_ROUTER_PROVIDERS in router mode)
+        """
+        if LLM_PROVIDER == 'router':
+            names = [name.strip() for name in LLM_ROUTER_PROVIDERS.split(',') if name.strip()]
+        elif LLM_PROVIDER in PROVIDERS:
+            names = [LLM_PROVIDER]
+        else:
+            names = []
+        providers = [_create_provider(name, self.timeout) for name in names]
+        return [provider for provider in providers if provider is not None]
+
+    def is_available(self) -> bool:
+        """
+        Check if the LLM is available
+        """
+        return bool(self.states)
+
+    def _ranked(self) -> List[ProviderState]:
+        """
+        Providers in routing order: closed circuits first, then by latency/error score
+        """
+        return sorted(self.states, key=lambda state: (state.breaker.state == CircuitBreaker.OPEN, state.score()))
+
+    def _invoke(self, state: ProviderState, messages: List[Dict], temperature: float,
+                max_tokens: int, timeout: float) -> Optional[str]:
+        """
+        Call one provider and record its latency and outcome
+        """
+        start = time.monotonic()
         try:
-            if self.provider == 'groq':
-                return self._call_groq(messages, temperature, max_tokens)
-            elif self.provider == 'ollama':
-                return self._call_ollama(messages, temperature)
+            response = state.provider.chat(messages, temperature, max_tokens, timeout)
         except Exception as e:
-            logger.error(f"LLM call failed: {e}")
+            state.record(time.monotonic() - start, ok=False)
+            logger.error(f"LLM call to {state.name} failed: {e}")
             return None
-        
+        state.record(time.monotonic() - start, ok=True)
+        return response
+
+    def call(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 500,
+             timeout: Optional[float] = None, expected_format: Optional[str] = None) -> Optional[str]:
+        """
+        Call the LLM within a deadline, skipping providers whose circuit is open
+        """
+        if not self.is_available():
+            return None
+
+        timeout = timeout or self.timeout
+        if len(self.states) == 1:
+            state = self.states[0]
+            if not state.breaker.allow():
+                logger.debug("LLM circuit open, skipping call")
+                return None
+            return self._invoke(state, messages, temperature, max_tokens, timeout)
+
+        return self._hedged_call(messages, temperature, max_tokens, timeout, expected_format)
+
+    def _hedged_call(self, messages: List[Dict], temperature: float, max_tokens: int,
+                     timeout: float, expected_format: Optional[str]) -> Optional[str]:
+        """
+        Send to the best provider and hedge to the next one after its p95 latency
+
+        The first response that passes validate_output wins. Losers that have not started
+        are cancelled; running ones are bounded by the per-call timeout and their result ignored.
+        """
+        queue = self._ranked()
+        pending = {}
+        start = time.monotonic()
+        deadline = start + timeout
+
+        def launch_next() -> bool:
+            while queue:
+                state = queue.pop(0)
+                if state.breaker.allow():
+                    future = _hedge_executor.submit(self._invoke, state, messages, temperature, max_tokens, timeout)
+                    pending[future] = state
+                    return True
+            return False
+
+        if not launch_next():
+            logger.debug("All LLM circuits open, skipping call")
+            return None
+        first_state = next(iter(pending.values()))
+        hedge_at = start + first_state.hedge_delay()
+        hedged = False
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_until = hedge_at if not hedged and queue else deadline
+            done, _ = wait(pending, timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                state = pending.pop(future)
+                response = future.result()
+                if response is not None and validate_output(response, expected_format):
+                    self._cancel(pending)
+                    if state is not first_state:
+                        with self._counts_lock:
+                            self.counts['hedge_wins'] += 1
+                    return response
+                logger.debug(f"Invalid or failed response from {state.name}")
+
+            if not hedged and queue and (not pending or time.monotonic() >= hedge_at):
+                hedged = launch_next()
+                if hedged:
+                    with self._counts_lock:
+                        self.counts['hedges'] += 1
+                    logger.debug("Fired hedged LLM request")
+            elif not pending:
+                launch_next()
+
+        self._cancel(pending)
         return None
 
+    @staticmethod
+    def _cancel(pending: Dict[Any, ProviderState]) -> None:
+        """Cancel calls that have not started, returning their circuit breaker slots"""
+        for future, state in pending.items():
+            if future.cancel():
+                state.breaker.release_trial()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Provider routing, hedging and circuit breaker state for monitoring
+        """
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {
+            'provider': self.provider,
+            'available': self.is_available(),
+            'providers': {state.name: state.snapshot() for state in self.states},
+            **counts
+        }
+
 llm_client = LLMClient()
 
 def validate_input(query: str, ip_address: str = None) -> None:
@@ -276,6 +643,12 @@ def understand_query(query: str, ip_address: str = None) -> Optional[Dict[str, A
     try:
         validate_input(query, ip_address)
         
+        cache_key = ' '.join(query.lower().split())
+        cached = understanding_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Query understanding cache hit: {cache_key}")
+            return copy.deepcopy(cached)
+        
         if not llm_client.is_available():
             logger.debug("LLM not available, skipping query understanding")
             return None
@@ -305,7 +678,7 @@ Rules:
             {"role": "user", "content": user_prompt}
         ]
         
-        response = llm_client.call(messages, temperature=0.2, max_tokens=300)
+        response = llm_client.call(messages, temperature=0.2, max_tokens=300, expected_format='json')
         
         if not response:
             return None
@@ -323,6 +696,7 @@ Rules:
                 return None
             
             logger.info(f"Query understanding successful: {parsed}")
+            understanding_cache.set(cache_key, copy.deepcopy(parsed))
             return parsed
             
         except json.JSONDecodeError as e:
@@ -375,7 +749,7 @@ Return empty array [] if no exclusions found."""
             {"role": "user", "content": user_prompt}
         ]
         
-        response = llm_client.call(messages, temperature=0.1, max_tokens=200)
+        response = llm_client.call(messages, temperature=0.1, max_tokens=200, expected_format='json')
         
         if not response:
             return None
@@ -406,43 +780,225 @@ Return empty array [] if no exclusions found."""
         logger.error(f"Error in ingredient extraction: {e}")
         return None
 
-def check_food_relevance(word: str) -> Optional[bool]:
+class FoodVerdictCache:
     """
-    Check if the word is food-related
+    Persistent word -> is-food verdicts shared by the LLM and embedding classifiers
+
+    Each verdict remembers its source. Embedding verdicts never replace LLM ones and can be
+    looked past, so the LLM still gets asked about those words once it is available.
+    Writes are debounced onto a background timer instead of happening per request.
     """
-    if not llm_client.is_available():
-        return None
-    
-    if len(word) < 2 or len(word) > 50:
-        return False
-    
-    try:
-        system_prompt = """You are a food relevance classifier. Determine if a word is related to food, cooking, ingredients, or cuisine.
+    def __init__(self, path: str = FOOD_VERDICT_CACHE, flush_interval: float = FOOD_VERDICT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._verdicts: Dict[str, Tuple[bool, str]] = {}
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.Lock()
+        self._load()
+        atexit.register(self.flush)
 
-Output ONLY 'yes' or 'no' (lowercase, one word)."""
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as fh:
+                data = json.load(fh)
+            for word, entry in data.items():
+                if isinstance(entry, list):
+                    self._verdicts[word] = (bool(entry[0]), entry[1] if entry[1] in VERDICT_SOURCES else EMBEDDING)
+                else:
+                    # Older files did not record a source, so let the LLM confirm them
+                    self._verdicts[word] = (bool(entry), EMBEDDING)
+            logger.info(f"Loaded {len(self._verdicts)} food relevance verdicts")
+        except (OSError, ValueError, AttributeError, IndexError, TypeError) as e:
+            logger.error(f"Failed to load food relevance verdicts: {e}")
 
-        user_prompt = f"Is this word food-related: '{word}'"
-        
+    def flush(self) -> None:
+        """
+        Write pending verdicts to disk
+        """
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+            snapshot = {word: [verdict, source] for word, (verdict, source) in self._verdicts.items()}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(snapshot, fh)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save food relevance verdicts: {e}")
+
+    def __len__(self) -> int:
+        return len(self._verdicts)
+
+    def get(self, word: str, sources: Tuple[str, ...] = VERDICT_SOURCES) -> Optional[bool]:
+        """
+        Cached verdict for a word, if it came from one of the given sources
+        """
+        with self._lock:
+            entry = self._verdicts.get(word)
+        if entry is None or entry[1] not in sources:
+            return None
+        return entry[0]
+
+    def update(self, verdicts: Dict[str, Optional[bool]], source: str = LLM) -> None:
+        """
+        Store known verdicts and schedule a write
+        """
+        with self._lock:
+            for word, verdict in verdicts.items():
+                if verdict is None:
+                    continue
+                current = self._verdicts.get(word)
+                if source == EMBEDDING and current is not None and current[1] == LLM:
+                    continue
+                self._verdicts[word] = (verdict, source)
+                self._dirty = True
+            if self._dirty and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+food_verdicts = FoodVerdictCache()
+
+def _classify_food_words(words: List[str]) -> Dict[str, Optional[bool]]:
+    """
+    Classify words with one LLM call per chunk, returning None for words the LLM skipped
+    """
+    system_prompt = """You are a food relevance classifier. For each word, determine if it is related to food, cooking, ingredients, or cuisine.
+
+Output ONLY a valid JSON object mapping every given word to true or false, for example:
+{"apple": true, "car": false}"""
+
+    verdicts = {}
+    for start in range(0, len(words), RELEVANCE_BATCH_MAX_WORDS):
+        chunk = words[start:start + RELEVANCE_BATCH_MAX_WORDS]
         messages = [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
+            {"role": "user", "content": f"Classify these words: {json.dumps(chunk)}"}
         ]
-        
-        response = llm_client.call(messages, temperature=0.1, max_tokens=10)
-        
-        if not response:
-            return None
-        
-        response_clean = response.strip().lower()
-        
-        if response_clean == 'yes':
-            return True
-        elif response_clean == 'no':
-            return False
+        response = llm_client.call(messages, temperature=0.1, max_tokens=10 * len(chunk) + 20,
+                                   expected_format='json')
+        if not response or not validate_output(response, expected_format='json'):
+            continue
+
+        parsed = json.loads(response)
+        if not isinstance(parsed, dict):
+            continue
+        answers = {str(word).strip().lower(): verdict for word, verdict in parsed.items()}
+        for word in chunk:
+            verdict = answers.get(word)
+            if isinstance(verdict, str):
+                verdict = {'yes': True, 'true': True, 'no': False, 'false': False}.get(verdict.strip().lower())
+            verdicts[word] = verdict if isinstance(verdict, bool) else None
+    return verdicts
+
+class _RelevanceBatch:
+    def __init__(self):
+        self.words = set()
+        self.results: Dict[str, Optional[bool]] = {}
+        self.done = threading.Event()
+
+class RelevanceBatcher:
+    """
+    Gathers unknown words from concurrent requests into a single classification call
+    """
+    def __init__(self, classify=_classify_food_words, window: float = RELEVANCE_BATCH_WINDOW):
+        self.classify = classify
+        self.window = window
+        self._open: Optional[_RelevanceBatch] = None
+        self._lock = threading.Lock()
+
+    def submit(self, words: List[str]) -> Dict[str, Optional[bool]]:
+        with self._lock:
+            leader = self._open is None
+            if leader:
+                self._open = _RelevanceBatch()
+            batch = self._open
+            batch.words.update(words)
+
+        if leader:
+            # The first caller waits briefly for others to join, then classifies for everyone
+            time.sleep(self.window)
+            with self._lock:
+                self._open = None
+            try:
+                batch.results = self.classify(sorted(batch.words))
+            except Exception as e:
+                logger.error(f"Error classifying food relevance batch: {e}")
+            finally:
+                batch.done.set()
         else:
-            return None
-            
-    except Exception as e:
-        logger.error(f"Error checking food relevance: {e}")
-        return None
+            batch.done.wait(LLM_TIMEOUT * 2 + self.window)
+
+        return {word: batch.results.get(word) for word in words}
+
+relevance_batcher = RelevanceBatcher()
+
+def check_food_relevance_batch(words: List[str], ask_llm: bool = True) -> Dict[str, Optional[bool]]:
+    """
+    Check which words are food-related, paying for each vocabulary word at most once
+
+    With ask_llm off only cached verdicts are used, and unknown words come back as None.
+    """
+    verdicts = {}
+    unknown = []
+    llm_available = ask_llm and llm_client.is_available()
+    for word in dict.fromkeys(word.strip().lower() for word in words):
+        if len(word) < 2 or len(word) > 50:
+            verdicts[word] = False
+            continue
+        # Embedding verdicts are only a fallback; ask the LLM about those words when it is up
+        cached = food_verdicts.get(word, (LLM,) if llm_available else VERDICT_SOURCES)
+        if cached is not None:
+            verdicts[word] = cached
+        else:
+            unknown.append(word)
+
+    if unknown and llm_available:
+        classified = relevance_batcher.submit(unknown)
+        food_verdicts.update(classified)
+        verdicts.update(classified)
+    else:
+        verdicts.update({word: None for word in unknown})
+
+    return verdicts
+
+def check_food_relevance(word: str) -> Optional[bool]:
+    """
+    Check if the word is food-related
+    """
+    return check_food_relevance_batch([word]).get(word.strip().lower())
+
+def check_router() -> None:
+    """
+    Exercise hedging, output validation and circuit breaking with stub providers
+    """
+    messages = [{'role': 'user', 'content': 'ping'}]
+
+    slow, fast = StubProvider('slow', latency=LLM_HEDGE_DELAY + 0.5), StubProvider('fast', latency=0.01)
+    client = LLMClient([slow, fast], timeout=LLM_HEDGE_DELAY + 2)
+    assert client.call(messages, expected_format='json') == fast.reply
+    assert client.counts == {'hedges': 1, 'hedge_wins': 1}, client.counts
+
+    invalid, valid = StubProvider('invalid', reply='not json'), StubProvider('valid', reply='{"valid": true}')
+    client = LLMClient([invalid, valid], timeout=1)
+    assert client.call(messages, expected_format='json') == valid.reply
+    assert invalid.calls == 1 and valid.calls == 1
+
+    failing = StubProvider('failing', fail=True)
+    client = LLMClient([failing], timeout=1)
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        assert client.call(messages) is None
+    assert client.states[0].breaker.state == CircuitBreaker.OPEN
+    assert client.call(messages) is None and failing.calls == BREAKER_FAILURE_THRESHOLD
+
+    logger.info("LLM router checks passed")
 
+if __name__ == '__main__':
+    check_router()
@@ -0,0 +1,72 @@
+import os
+import secrets
+import threading
+from typing import List, Optional
+from src.components.cache import TTLCache
+from src.components.recipe import Recipe
+
+# Server-side cursors for "more results"
+CURSOR_TTL = int(os.getenv('CURSOR_TTL', '600'))
+MAX_CURSORS = 1000
+
+class SearchCursor:
+    """
+    Ranked candidates of one search, served page by page
+    """
+    def __init__(self, query: str, query_original: str, search_query: str, ranked: List[Recipe],
+                 api_offset: int, exhausted: bool):
+        self.query = query
+        self.query_original = query_original
+        self.search_query = search_query
+        self.ranked = list(ranked)
+        self.position = 0
+        self.api_offset = api_offset
+        self.exhausted = exhausted
+        self.seen = {recipe.key for recipe in self.ranked}
+        self.lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return len(self.ranked) - self.position
+
+    @property
+    def has_more(self) -> bool:
+        return self.remaining > 0 or not self.exhausted
+
+    def extend(self, recipes: List[Recipe]) -> int:
+        """
+        Append newly ranked candidates, skipping ones already seen; returns the number added
+        """
+        added = 0
+        for recipe in recipes:
+            if recipe.key not in self.seen:
+                self.seen.add(recipe.key)
+                self.ranked.append(recipe)
+                added += 1
+        return added
+
+    def take(self, number: int) -> List[Recipe]:
+        page = self.ranked[self.position:self.position + number]
+        self.position += len(page)
+        return page
+
+class CursorStore:
+    """
+    Opaque, expiring cursor tokens mapped to search cursors
+    """
+    def __init__(self, ttl: int = CURSOR_TTL, maxsize: int = MAX_CURSORS):
+        self._cursors = TTLCache(maxsize, ttl)
+
+    def create(self, cursor: SearchCursor) -> str:
+        token = secrets.token_urlsafe(16)
+        self._cursors.set(token, cursor)
+        return token
+
+    def get(self, token: str) -> Optional[SearchCursor]:
+        cursor = self._cursors.get(token)
+        if cursor is not None:
+            # Every page served extends the cursor's lifetime
+            self._cursors.set(token, cursor)
+        return cursor
+
+cursor_store = CursorStore()
@@ -0,0 +1,128 @@
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+from src.components.recipe import Recipe, to_recipes
+
+# Words that never identify an ingredient: quantities, units, prep notes and query filler
+STOP_WORDS = {
+    # units
+    'cup', 'cups', 'c', 'tablespoon', 'tablespoons', 'tbsp', 'tbs', 'teaspoon', 'teaspoons', 'tsp',
+    'oz', 'ounce', 'ounces', 'lb', 'lbs', 'pound', 'pounds', 'g', 'gram', 'grams', 'kg', 'ml', 'l',
+    'liter', 'liters', 'pinch', 'dash', 'clove', 'cloves', 'can', 'cans', 'package', 'packages',
+    'pkg', 'slice', 'slices', 'piece', 'pieces', 'stick', 'sticks', 'bunch', 'handful', 'quart',
+    'pint', 'jar', 'bottle', 'head', 'sprig', 'sprigs', 'inch', 'large', 'medium', 'small', 'whole',
+    # preparation
+    'chopped', 'diced', 'minced', 'sliced', 'grated', 'shredded', 'fresh', 'freshly', 'ground',
+    'finely', 'roughly', 'thinly', 'peeled', 'crushed', 'melted', 'softened', 'cooked', 'uncooked',
+    'boneless', 'skinless', 'divided', 'optional', 'taste', 'room', 'temperature', 'plus', 'more',
+    'about', 'into', 'cut', 'cubed', 'halved', 'quartered', 'drained', 'rinsed', 'beaten', 'packed',
+    # query filler
+    'what', 'which', 'i', 'me', 'my', 'we', 'can', 'could', 'make', 'cook', 'prepare', 'with',
+    'using', 'have', 'got', 'some', 'and', 'or', 'a', 'an', 'the', 'of', 'for', 'to', 'in', 'on',
+    'recipe', 'recipes', 'dish', 'dishes', 'meal', 'meals', 'something', 'anything', 'please',
+    'show', 'find', 'give', 'leftover', 'leftovers', 'only', 'just', 'few', 'at', 'home', 'is',
+}
+
+# Ingredients assumed to be in every kitchen, never counted as missing
+PANTRY_STAPLES = {'salt', 'water', 'oil', 'ice'}
+
+_TOKEN_PATTERN = re.compile(r"[a-z]+")
+_PARENTHETICAL_PATTERN = re.compile(r"\([^)]*\)")
+_ITEM_SEPARATOR_PATTERN = re.compile(r",|;|\+|&|\band\b|\bor\b|\n")
+
+def _singular(word: str) -> str:
+    """Reduce a plural ingredient word to its singular form"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('oes', 'ches', 'shes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us')):
+        return word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into singular ingredient-style tokens, dropping units and filler words
+    """
+    text = _PARENTHETICAL_PATTERN.sub(' ', text.lower())
+    return [_singular(word) for word in _TOKEN_PATTERN.findall(text)
+            if len(word) > 1 and word not in STOP_WORDS]
+
+def normalize_ingredient(text: str) -> FrozenSet[str]:
+    """
+    Normalize an ingredient line or pantry item into its ingredient tokens
+    """
+    return frozenset(tokenize(text))
+
+def parse_pantry(query: str) -> List[FrozenSet[str]]:
+    """
+    Split a "what can I make with chicken, rice and peppers" query into pantry items
+    """
+    items = []
+    for chunk in _ITEM_SEPARATOR_PATTERN.split(query.lower()):
+        tokens = normalize_ingredient(chunk)
+        if tokens and tokens not in items:
+            items.append(tokens)
+    return items
+
+class IngredientIndex:
+    """
+    Inverted index from normalized ingredient tokens to the recipes that use them
+    """
+    def __init__(self):
+        self.recipes: List[Recipe] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._ingredient_tokens: List[Tuple[FrozenSet[str], ...]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    def add(self, recipes: Iterable) -> int:
+        """
+        Index new recipes, skipping ones already present; returns the number added
+        """
+        added = 0
+        with self._lock:
+            for recipe in to_recipes(recipes):
+                if recipe.key in self._ids:
+                    continue
+                recipe_id = len(self.recipes)
+                self._ids[recipe.key] = recipe_id
+                self.recipes.append(recipe)
+
+                lines = tuple(normalize_ingredient(ingredient) for ingredient in recipe.ingredients)
+                self._ingredient_tokens.append(lines)
+                for token in frozenset().union(*lines):
+                    self._postings[token].add(recipe_id)
+                added += 1
+        return added
+
+    def match(self, pantry: List[FrozenSet[str]], top_k: int = 3) -> List[Tuple[Recipe, int, int]]:
+        """
+        Rank recipes by how many pantry items they use, then by fewest missing ingredients
+
+        Returns (recipe, covered_items, missing_ingredients) tuples.
+        """
+        if not pantry:
+            return []
+
+        with self._lock:
+            coverage = Counter()
+            for item in pantry:
+                # An item matches a recipe only if all of its tokens appear in the recipe
+                postings = [self._postings.get(token, set()) for token in item]
+                coverage.update(set.intersection(*postings))
+
+            available = frozenset().union(*pantry) | PANTRY_STAPLES
+            ranked = []
+            for recipe_id, covered in coverage.items():
+                missing = sum(1 for line in self._ingredient_tokens[recipe_id]
+                              if line and not line & available)
+                ranked.append((-covered, missing, recipe_id))
+            ranked.sort()
+
+            return [(self.recipes[recipe_id], -covered, missing)
+                    for covered, missing, recipe_id in ranked[:top_k]]
@@ -0,0 +1,231 @@
+import io
+import os
+import sys
+import time
+import pstats
+import signal
+import cProfile
+import threading
+import functools
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from src.logger import setup_logger
+
+logger = setup_logger()
+
+# Profiling configuration
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '15'))
+PROFILE_TRACE_FRAMES = int(os.getenv('PROFILE_TRACE_FRAMES', '5'))
+PROFILE_RSS_INTERVAL = float(os.getenv('PROFILE_RSS_INTERVAL', '1.0'))
+PROFILE_DUMP_DIR = os.getenv('PROFILE_DUMP_DIR')
+RSS_SAMPLES = 600
+
+def current_rss() -> Optional[int]:
+    """
+    Resident set size of this process in bytes, or None where it cannot be read
+    """
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS: bytes on macOS, kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _mb(size: Optional[int]) -> Optional[float]:
+    return round(size / (1 << 20), 1) if size is not None else None
+
+class Profiler:
+    """
+    Runtime-toggled memory and CPU profiling for search requests
+
+    While enabled, tracemalloc traces Python allocations, a background thread samples RSS,
+    and requests run through profiled() are cProfiled into one aggregate. Only one request
+    is cProfiled at a time; concurrent ones run unprofiled.
+    """
+    def __init__(self, top_n: int = PROFILE_TOP_N, dump_dir: Optional[str] = PROFILE_DUMP_DIR):
+        self.top_n = top_n
+        self.dump_dir = dump_dir
+        self.enabled = False
+        self.started = None
+        self.requests = 0
+        # Extra figures for reports, e.g. model and embedding sizes
+        self.footprint: Optional[Callable[[], Dict[str, Any]]] = None
+        self._stats: Optional[pstats.Stats] = None
+        self._rss = deque(maxlen=RSS_SAMPLES)
+        self._cpu_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def enable(self) -> None:
+        with self._lock:
+            if self.enabled:
+                return
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_TRACE_FRAMES)
+            self._stats = None
+            self._rss.clear()
+            self.requests = 0
+            self.started = datetime.now()
+            self.enabled = True
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_rss, name='rss-sampler', daemon=True)
+            self._sampler.start()
+        logger.info("Profiling enabled")
+
+    def disable(self) -> Dict[str, Any]:
+        """
+        Stop profiling and return the final report
+        """
+        report = self.report()
+        with self._lock:
+            if not self.enabled:
+                return report
+            self.enabled = False
+            self._stop.set()
+            tracemalloc.stop()
+        logger.info("Profiling disabled")
+        return report
+
+    def toggle(self) -> bool:
+        if self.enabled:
+            self.log_report(self.disable())
+        else:
+            self.enable()
+        return self.enabled
+
+    def _sample_rss(self) -> None:
+        while not self._stop.is_set():
+            rss = current_rss()
+            if rss is not None:
+                self._rss.append((time.time(), rss))
+            self._stop.wait(PROFILE_RSS_INTERVAL)
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        """
+        cProfile the enclosed block if profiling is on and no other request holds the profiler
+        """
+        if not self.enabled or not self._cpu_lock.acquire(blocking=False):
+            yield
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+            self._record(name, profile)
+        finally:
+            self._cpu_lock.release()
+
+    def profiled(self, func: Callable) -> Callable:
+        """Decorator form of profile()"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.profile(func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _record(self, name: str, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self.requests += 1
+            if self._stats is None:
+                self._stats = pstats.Stats(profile, stream=io.StringIO())
+            else:
+                self._stats.add(profile)
+
+        if self.dump_dir:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.prof")
+            profile.dump_stats(path)
+            logger.debug(f"Wrote profile to {path}")
+
+    def hot_functions(self) -> List[Dict[str, Any]]:
+        """
+        Functions with the most cumulative time across profiled requests
+        """
+        with self._lock:
+            if self._stats is None:
+                return []
+            stats = self._stats.stats
+            ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top_n]
+        return [{
+            'function': f"{os.path.relpath(filename) if filename.startswith(os.sep) else filename}:{line}({func})",
+            'calls': calls,
+            'total_time': round(total, 4),
+            'cumulative_time': round(cumulative, 4)
+        } for (filename, line, func), (_, calls, total, cumulative, _) in ranked]
+
+    def allocation_sites(self) -> List[Dict[str, Any]]:
+        """
+        Source lines holding the most traced Python memory
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        return [{
+            'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'blocks': stat.count
+        } for stat in snapshot.statistics('lineno')[:self.top_n]]
+
+    def report(self) -> Dict[str, Any]:
+        samples = [rss for _, rss in self._rss]
+        report = {
+            'enabled': self.enabled,
+            'started': self.started.isoformat() if self.started else None,
+            'profiled_requests': self.requests,
+            'rss_mb': {
+                'current': _mb(current_rss()),
+                'min': _mb(min(samples)) if samples else None,
+                'max': _mb(max(samples)) if samples else None,
+                'samples': len(samples)
+            },
+            'traced_mb': None,
+            'allocation_sites': self.allocation_sites(),
+            'hot_functions': self.hot_functions()
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report['traced_mb'] = {'current': _mb(current), 'peak': _mb(peak)}
+        if self.footprint is not None:
+            report['footprint'] = self.footprint()
+        return report
+
+    def log_report(self, report: Dict[str, Any]) -> None:
+        logger.info(f"Profile over {report['profiled_requests']} requests, RSS {report['rss_mb']}")
+        for site in report['allocation_sites']:
+            logger.info(f"Allocation {site['size_kb']} KB in {site['blocks']} blocks at {site['site']}")
+        for func in report['hot_functions']:
+            logger.info(f"Hot {func['cumulative_time']}s cumulative, {func['calls']} calls: {func['function']}")
+        if 'footprint' in report:
+            logger.info(f"Memory footprint: {report['footprint']}")
+
+def install_signal_handler(profiler: 'Profiler', signum: Optional[int] = None) -> bool:
+    """
+    Toggle profiling on SIGUSR1; returns False where signals are unavailable
+    """
+    signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    # Toggling takes locks, so hand it to a thread rather than running it inside the handler
+    signal.signal(signum, lambda *_: threading.Thread(target=profiler.toggle, name='profile-toggle').start())
+    logger.info(f"Send signal {int(signum)} to process {os.getpid()} to toggle profiling")
+    return True
+
+profiler = Profiler()
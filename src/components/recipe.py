@@ -0,0 +1,227 @@
+import sys
+import json
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Length prefix for records written to disk
+_RECORD_HEADER = struct.Struct('<I')
+
+# Binary encodings understood by Recipe.from_bytes
+_FORMAT_MSGPACK = b'm'
+_FORMAT_JSON = b'j'
+
+class Recipe:
+    """
+    Compact recipe record shared by the API client, the caches and the app
+    """
+    __slots__ = ('name', 'ingredients', 'steps', 'readyInMinutes', 'servings', 'sourceUrl',
+                 '_ingredients_text', '_json')
+
+    def __init__(self, name: str, ingredients: Iterable[str] = (), steps: Iterable[str] = (),
+                 readyInMinutes: int = 0, servings: int = 0, sourceUrl: str = ''):
+        self.name = name
+        # Ingredient lines repeat heavily across recipes ("1 tsp salt"), so intern them
+        self.ingredients = tuple(sys.intern(ingredient) for ingredient in ingredients)
+        self.steps = tuple(steps)
+        self.readyInMinutes = readyInMinutes or 0
+        self.servings = servings or 0
+        self.sourceUrl = sourceUrl or ''
+        self._ingredients_text = None
+        self._json = None
+
+    def __repr__(self) -> str:
+        return f"Recipe(name={self.name!r}, ingredients={len(self.ingredients)}, steps={len(self.steps)})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Recipe):
+            return NotImplemented
+        return self._as_tuple() == other._as_tuple()
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def _as_tuple(self) -> tuple:
+        return (self.name, self.ingredients, self.steps, self.readyInMinutes, self.servings, self.sourceUrl)
+
+    @property
+    def key(self) -> str:
+        """
+        Identity of the recipe across fetches
+        """
+        return self.sourceUrl or self.name
+
+    @property
+    def ingredients_text(self) -> str:
+        """
+        Comma-joined ingredient list, computed once
+        """
+        if self._ingredients_text is None:
+            self._ingredients_text = ', '.join(self.ingredients)
+        return self._ingredients_text
+
+    @property
+    def embedding_text(self) -> str:
+        """
+        Text used to embed the recipe
+        """
+        return f"{self.name} {' '.join(self.ingredients)}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Recipe':
+        """
+        Build a recipe from the dict shape produced by search_recipes
+        """
+        return cls(
+            name=data.get('name', ''),
+            ingredients=data.get('ingredients', ()),
+            steps=data.get('steps', ()),
+            readyInMinutes=data.get('readyInMinutes', 0),
+            servings=data.get('servings', 0),
+            sourceUrl=data.get('sourceUrl', '')
+        )
+
+    @classmethod
+    def from_spoonacular(cls, recipe: Dict[str, Any]) -> 'Recipe':
+        """
+        Build a recipe from a fully parsed Spoonacular result
+        """
+        return cls(
+            name=recipe['title'],
+            ingredients=[ingredient['original'] for ingredient in recipe.get('extendedIngredients', [])],
+            steps=[step['step'] for step in recipe.get('analyzedInstructions', [{}])[0].get('steps', [])]
+                  if recipe.get('analyzedInstructions') else (recipe.get('instructions') or '').split('\n'),
+            readyInMinutes=recipe.get('readyInMinutes', 0),
+            servings=recipe.get('servings', 0),
+            sourceUrl=recipe.get('sourceUrl', '')
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the recipe back to a plain dict
+        """
+        return {
+            'name': self.name,
+            'ingredients': list(self.ingredients),
+            'steps': list(self.steps),
+            'readyInMinutes': self.readyInMinutes,
+            'servings': self.servings,
+            'sourceUrl': self.sourceUrl
+        }
+
+    def to_json(self) -> str:
+        """
+        Pre-serialized JSON fragment in the /search response shape, reused across responses
+        """
+        if self._json is None:
+            self._json = json.dumps({
+                'name': self.name,
+                'ingredients': self.ingredients_text,
+                'steps': list(self.steps),
+                'readyInMinutes': self.readyInMinutes,
+                'servings': self.servings,
+                'sourceUrl': self.sourceUrl
+            })
+        return self._json
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary encoding for cache and disk storage
+        """
+        fields = [self.name, list(self.ingredients), list(self.steps),
+                  self.readyInMinutes, self.servings, self.sourceUrl]
+        if msgpack is not None:
+            return _FORMAT_MSGPACK + msgpack.packb(fields, use_bin_type=True)
+        return _FORMAT_JSON + json.dumps(fields, separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Recipe':
+        """
+        Decode a recipe produced by to_bytes
+        """
+        fmt, payload = data[:1], data[1:]
+        if fmt == _FORMAT_MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack is required to decode this recipe")
+            fields = msgpack.unpackb(payload, raw=False)
+        elif fmt == _FORMAT_JSON:
+            fields = json.loads(payload.decode('utf-8'))
+        else:
+            raise ValueError(f"Unknown recipe encoding: {fmt!r}")
+        return cls(*fields)
+
+def write_records(fh, recipes: Iterable[Recipe]) -> int:
+    """
+    Append length-prefixed recipe records to a binary file, returning bytes written
+    """
+    written = 0
+    for recipe in recipes:
+        data = recipe.to_bytes()
+        fh.write(_RECORD_HEADER.pack(len(data)))
+        fh.write(data)
+        written += _RECORD_HEADER.size + len(data)
+    return written
+
+def iter_records(fh) -> Iterator[Recipe]:
+    """
+    Read recipe records written by write_records
+    """
+    while True:
+        header = fh.read(_RECORD_HEADER.size)
+        if len(header) < _RECORD_HEADER.size:
+            return
+        (length,) = _RECORD_HEADER.unpack(header)
+        data = fh.read(length)
+        if len(data) < length:
+            return
+        yield Recipe.from_bytes(data)
+
+def to_recipes(items: Optional[Iterable[Any]]) -> List[Recipe]:
+    """
+    Normalize dicts or recipes into a list of Recipe objects
+    """
+    if not items:
+        return []
+    return [item if isinstance(item, Recipe) else Recipe.from_dict(item) for item in items]
+
+def _benchmark(count: int = 100_000) -> None:
+    """
+    Measure the memory cost of holding recipes as dicts versus Recipe objects
+    """
+    import random
+    import tracemalloc
+
+    pantry = ['1 cup rice', '2 cloves garlic', '1 tsp salt', '1 tbsp olive oil', '1 onion, chopped',
+              '2 chicken breasts', '1 red bell pepper', '1 cup milk', '2 eggs', '200g pasta']
+    rng = random.Random(0)
+
+    def make(i):
+        return {
+            'name': f'Recipe {i}',
+            # Fresh string objects, as a JSON parser would produce
+            'ingredients': [(' ' + ingredient)[1:] for ingredient in rng.sample(pantry, 6)],
+            'steps': [f'Step {n} of recipe {i}' for n in range(4)],
+            'readyInMinutes': 30,
+            'servings': 4,
+            'sourceUrl': f'https://example.com/recipes/{i}'
+        }
+
+    for label, build in (('dict', make), ('Recipe', lambda i: Recipe.from_dict(make(i)))):
+        rng.seed(0)
+        tracemalloc.start()
+        items = [build(i) for i in range(count)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:>6}: {current / count:8.1f} bytes/recipe at {count} recipes")
+        del items
+
+    encoded = sum(len(Recipe.from_dict(make(i)).to_bytes()) for i in range(1000))
+    print(f"encoded: {encoded / 1000:6.1f} bytes/recipe ({'msgpack' if msgpack else 'json'})")
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,218 @@
+import os
+import math
+import heapq
+import bisect
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from src.components.pantry import tokenize
+from src.components.recipe import Recipe, to_recipes
+
+# Retrieval configuration
+HYBRID_SHORTLIST = int(os.getenv('HYBRID_SHORTLIST', '50'))
+HYBRID_FUSION = os.getenv('HYBRID_FUSION', 'rrf')
+HYBRID_RRF_K = int(os.getenv('HYBRID_RRF_K', '60'))
+HYBRID_ALPHA = float(os.getenv('HYBRID_ALPHA', '0.5'))
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Recipe names say more about a recipe than any single step, so they count extra
+NAME_WEIGHT = 3
+
+def recipe_terms(recipe: Recipe) -> List[str]:
+    """
+    Lexical terms for a recipe drawn from its name, ingredients and steps
+    """
+    terms = tokenize(recipe.name) * NAME_WEIGHT
+    for ingredient in recipe.ingredients:
+        terms.extend(tokenize(ingredient))
+    for step in recipe.steps:
+        terms.extend(tokenize(step))
+    return terms
+
+class BM25Index:
+    """
+    Incremental BM25 index with per-term posting lists
+    """
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths: List[int] = []
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, terms: Sequence[str]) -> int:
+        """
+        Index a document's terms and return its id
+        """
+        doc_id = len(self._doc_lengths)
+        for term, freq in Counter(terms).items():
+            self._postings[term].append((doc_id, freq))
+        self._doc_lengths.append(len(terms))
+        self._total_length += len(terms)
+        return doc_id
+
+    def search(self, terms: Iterable[str], limit: int) -> List[Tuple[int, float]]:
+        """
+        Score only the documents that contain a query term; returns (doc_id, score) pairs
+        """
+        count = len(self._doc_lengths)
+        if not count:
+            return []
+
+        avg_length = self._total_length / count
+        scores = defaultdict(float)
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, freq in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+class HybridRetriever:
+    """
+    Lexical candidate generation over the local recipe corpus with vector rescoring of a shortlist
+    """
+    def __init__(self, encoder: Callable[[List[str]], np.ndarray], shortlist: int = HYBRID_SHORTLIST,
+                 fusion: str = HYBRID_FUSION, rrf_k: int = HYBRID_RRF_K, alpha: float = HYBRID_ALPHA):
+        if fusion not in ('rrf', 'linear'):
+            raise ValueError(f"Unknown fusion method: {fusion}")
+        self.encoder = encoder
+        self.shortlist = shortlist
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.alpha = alpha
+        self.recipes: List[Recipe] = []
+        self._ids: Dict[str, int] = {}
+        self._lexical = BM25Index()
+        # Embedding blocks as (first recipe id, matrix); blocks may be memory-mapped
+        self._block_starts: List[int] = []
+        self._blocks: List[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the embedding blocks, including memory-mapped ones that are paged in lazily"""
+        return sum(block.nbytes for block in self._blocks)
+
+    def add(self, recipes: Iterable, embeddings: Optional[np.ndarray] = None) -> int:
+        """
+        Add recipes, encoding them unless embeddings are given; returns the number added
+        """
+        recipes = to_recipes(recipes)
+        with self._lock:
+            fresh = [i for i, recipe in enumerate(recipes) if recipe.key not in self._ids]
+        if not fresh:
+            return 0
+
+        if embeddings is None:
+            vectors = self.encoder([recipes[i].embedding_text for i in fresh])
+        elif len(fresh) == len(recipes):
+            vectors = embeddings
+        else:
+            vectors = np.asarray(embeddings)[fresh]
+        return self._add_block([recipes[i] for i in fresh], vectors)
+
+    def _add_block(self, recipes: List[Recipe], vectors: np.ndarray) -> int:
+        """
+        Register recipes with an aligned embedding matrix without copying it
+        """
+        with self._lock:
+            keep = []
+            for i, recipe in enumerate(recipes):
+                if recipe.key in self._ids:
+                    continue
+                self._ids[recipe.key] = len(self.recipes) + len(keep)
+                keep.append(i)
+            if not keep:
+                return 0
+            if len(keep) < len(recipes):
+                vectors = np.asarray(vectors)[keep]
+
+            self._block_starts.append(len(self.recipes))
+            self._blocks.append(vectors)
+            for i in keep:
+                self.recipes.append(recipes[i])
+                self._lexical.add(recipe_terms(recipes[i]))
+            return len(keep)
+
+    def _vectors(self, ids: Sequence[int]) -> np.ndarray:
+        """
+        Gather normalized embeddings for the given recipe ids
+        """
+        rows = []
+        for recipe_id in ids:
+            block = bisect.bisect_right(self._block_starts, recipe_id) - 1
+            rows.append(self._blocks[block][recipe_id - self._block_starts[block]])
+        vectors = np.asarray(rows, dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def _dense_scan(self, query_vector: np.ndarray, limit: int) -> List[Tuple[int, float]]:
+        """
+        Score every recipe by cosine similarity, block by block
+        """
+        scores = []
+        for start, block in zip(self._block_starts, self._blocks):
+            matrix = np.asarray(block, dtype=np.float32)
+            norms = np.maximum(np.linalg.norm(matrix, axis=1), 1e-12)
+            scores.append((matrix @ query_vector) / norms)
+        if not scores:
+            return []
+        scores = np.concatenate(scores)
+        top = np.argsort(-scores)[:limit]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def _fuse(self, lexical: List[Tuple[int, float]], dense: List[Tuple[int, float]]) -> List[int]:
+        """
+        Combine lexical and dense rankings into one ordering of recipe ids
+        """
+        fused = defaultdict(float)
+        if self.fusion == 'rrf':
+            for ranking in (lexical, dense):
+                for rank, (recipe_id, _) in enumerate(ranking, 1):
+                    fused[recipe_id] += 1.0 / (self.rrf_k + rank)
+        else:
+            top_lexical = lexical[0][1] if lexical else 1.0
+            for recipe_id, score in lexical:
+                fused[recipe_id] += self.alpha * score / top_lexical
+            for recipe_id, score in dense:
+                fused[recipe_id] += (1 - self.alpha) * score
+        return sorted(fused, key=fused.get, reverse=True)
+
+    def search(self, query: str, top_k: int = 3, lexical_only: bool = False) -> List[Recipe]:
+        """
+        Retrieve recipes for a query using lexical candidates rescored with embeddings
+        """
+        with self._lock:
+            if not self.recipes:
+                return []
+            lexical = self._lexical.search(tokenize(query), self.shortlist)
+            if lexical_only:
+                # Cheap path for overload: no query encoding at all
+                return [self.recipes[recipe_id] for recipe_id, _ in lexical[:top_k]]
+
+        query_vector = np.asarray(self.encoder([query])[0], dtype=np.float32)
+        query_vector = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+
+        with self._lock:
+            if lexical:
+                ids = [recipe_id for recipe_id, _ in lexical]
+                cosine = self._vectors(ids) @ query_vector
+                dense = sorted(zip(ids, cosine.tolist()), key=lambda item: item[1], reverse=True)
+            else:
+                # Nothing matched lexically, fall back to a full vector scan
+                dense = self._dense_scan(query_vector, self.shortlist)
+            return [self.recipes[recipe_id] for recipe_id in self._fuse(lexical, dense)[:top_k]]
@@ -0,0 +1,154 @@
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Request priorities, most important first
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Quota configuration
+DAILY_LIMIT = int(os.getenv('SPOONACULAR_DAILY_LIMIT', '150'))
+QUOTA_BURST = int(os.getenv('QUOTA_BURST', '10'))
+QUOTA_BATCH_RESERVE = float(os.getenv('QUOTA_BATCH_RESERVE', '0.3'))
+# Share of the daily budget interactive requests may spend ahead of the pace, repaid by later refills
+QUOTA_INTERACTIVE_BORROW = float(os.getenv('QUOTA_INTERACTIVE_BORROW', '0.25'))
+
+class QuotaScheduler:
+    """
+    Token bucket that paces a daily upstream budget across the rest of the day
+
+    The bucket refills at (remaining budget / seconds left today), so unused budget carries
+    forward instead of being spent by the first users of the morning. Interactive calls may
+    borrow up to a `borrow` share of the daily budget ahead of the pace; batch work may only spend from a full-enough
+    bucket and never dips into the share reserved for interactive use.
+    """
+    def __init__(self, daily_limit: int = DAILY_LIMIT, burst: int = QUOTA_BURST,
+                 batch_reserve: float = QUOTA_BATCH_RESERVE, borrow: float = QUOTA_INTERACTIVE_BORROW,
+                 clock: Callable[[], float] = time.time):
+        self.daily_limit = daily_limit
+        self.burst = max(1, burst)
+        self.batch_reserve = batch_reserve
+        self.borrow = max(0, int(daily_limit * borrow))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._reset(self.clock())
+
+    def _reset(self, now: float) -> None:
+        self.day = datetime.fromtimestamp(now).date()
+        self.used = 0
+        self.tokens = float(min(self.burst, self.daily_limit))
+        self.last_refill = now
+        self.granted = {priority: 0 for priority in PRIORITIES}
+        self.denied = {priority: 0 for priority in PRIORITIES}
+
+    def _seconds_left_today(self, now: float) -> float:
+        midnight = datetime.combine(self.day + timedelta(days=1), datetime.min.time())
+        return max(1.0, midnight.timestamp() - now)
+
+    def _refill_rate(self, now: float) -> float:
+        """Tokens per second that spread the remaining budget evenly over the rest of the day"""
+        return (self.daily_limit - self.used) / self._seconds_left_today(now)
+
+    def _refill(self, now: float) -> None:
+        if datetime.fromtimestamp(now).date() > self.day:
+            self._reset(now)
+            return
+        elapsed = max(0.0, now - self.last_refill)
+        remaining = self.daily_limit - self.used
+        self.tokens = min(self.tokens + elapsed * self._refill_rate(now), self.burst, remaining)
+        self.last_refill = now
+
+    def _tokens_needed(self, priority: str) -> float:
+        """Bucket level a call of this priority needs; interactive calls may run the bucket into debt"""
+        if priority == INTERACTIVE:
+            return 1.0 - self.borrow
+        return max(1.0, self.burst / 2)
+
+    def _allowed(self, priority: str) -> bool:
+        remaining = self.daily_limit - self.used
+        if remaining <= 0 or self.tokens < self._tokens_needed(priority):
+            return False
+        if priority == INTERACTIVE:
+            return True
+        # Batch work must leave the interactive reserve untouched
+        return remaining - 1 >= self.daily_limit * self.batch_reserve
+
+    def acquire(self, priority: str = INTERACTIVE) -> bool:
+        """
+        Account for one upstream call; returns False if the call should not be made
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        with self._lock:
+            self._refill(self.clock())
+            if not self._allowed(priority):
+                self.denied[priority] += 1
+                return False
+            self.tokens -= 1
+            self.used += 1
+            self.granted[priority] += 1
+            return True
+
+    def available(self, priority: str = INTERACTIVE) -> bool:
+        """
+        Check whether a call would currently be granted, without spending budget
+        """
+        with self._lock:
+            self._refill(self.clock())
+            return self._allowed(priority)
+
+    def wait_time(self, priority: str = INTERACTIVE) -> Optional[float]:
+        """
+        Seconds until the bucket refills enough for a call, or None if none will be granted today
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if self._allowed(priority):
+                return 0.0
+            remaining = self.daily_limit - self.used
+            needed = self._tokens_needed(priority)
+            if priority != INTERACTIVE and remaining - 1 < self.daily_limit * self.batch_reserve:
+                return None
+            if remaining <= 0 or remaining < needed:
+                return None
+            rate = self._refill_rate(now)
+            if rate <= 0:
+                return None
+            return (needed - self.tokens) / rate
+
+    def forecast(self) -> Dict[str, Any]:
+        """
+        Remaining budget and when it will run out at the current pace
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            remaining = self.daily_limit - self.used
+            day_start = datetime.combine(self.day, datetime.min.time()).timestamp()
+            elapsed = max(1.0, now - day_start)
+            pace = self.used / elapsed
+            seconds_left = self._seconds_left_today(now)
+
+            exhausted_at = None
+            if pace > 0 and remaining / pace < seconds_left:
+                exhausted_at = datetime.fromtimestamp(now + remaining / pace).isoformat(timespec='minutes')
+
+            return {
+                'daily_limit': self.daily_limit,
+                'used': self.used,
+                'remaining': remaining,
+                'tokens': round(self.tokens, 2),
+                'refill_per_hour': round(self._refill_rate(now) * 3600, 2),
+                'calls_per_hour': round(pace * 3600, 2),
+                'projected_exhaustion': exhausted_at,
+                'resets_at': datetime.fromtimestamp(now + seconds_left).isoformat(timespec='minutes'),
+                'granted': dict(self.granted),
+                'denied': dict(self.denied)
+            }
@@ -0,0 +1,87 @@
+import os
+from typing import Any, Dict
+from dotenv import load_dotenv
+from src.components.admission import STAGE_LIMITS
+from src.logger import setup_logger
+
+logger = setup_logger()
+
+# main.py imports this before the app, so read .env here
+load_dotenv()
+
+# Inference thread overrides; unset means derive them from the serving mode
+INFERENCE_THREADS = os.getenv('INFERENCE_THREADS')
+INFERENCE_INTEROP_THREADS = os.getenv('INFERENCE_INTEROP_THREADS')
+
+SERVING_MODES = ('web', 'daemon', 'cli', 'ingest')
+
+# Settings applied by configure_threads, reported on /metrics
+settings: Dict[str, Any] = {}
+
+def available_cores() -> int:
+    """CPU cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def plan_threads(mode: str, workers: int = 1, cores: int = None) -> Dict[str, Any]:
+    """
+    Work out intra-op threads, inter-op threads and tokenizer parallelism for a serving mode
+
+    Concurrent encoders share the cores between them instead of each taking all of them:
+    the web app and daemon run up to STAGE_ENCODE_LIMIT encodes at once and ingest runs
+    one encoder per worker process.
+    """
+    if mode not in SERVING_MODES:
+        raise ValueError(f"Unknown serving mode: {mode}")
+    cores = cores or available_cores()
+
+    if mode in ('web', 'daemon'):
+        concurrent_encoders = STAGE_LIMITS['encode']
+    elif mode == 'ingest':
+        concurrent_encoders = workers
+    else:
+        concurrent_encoders = 1
+
+    return {
+        'mode': mode,
+        'cores': cores,
+        'intra_op': int(INFERENCE_THREADS) if INFERENCE_THREADS else max(1, cores // max(1, concurrent_encoders)),
+        # Encoding a batch is one sequential graph, so extra inter-op threads only add contention
+        'inter_op': int(INFERENCE_INTEROP_THREADS) if INFERENCE_INTEROP_THREADS else 1,
+        # Rust tokenizer threads would compete with torch whenever more than one encoder runs
+        'tokenizers_parallelism': os.getenv('TOKENIZERS_PARALLELISM',
+                                            'true' if concurrent_encoders == 1 else 'false')
+    }
+
+def configure_threads(mode: str, workers: int = 1) -> Dict[str, Any]:
+    """
+    Apply the thread plan for a serving mode; call before the models are loaded
+
+    Environment variables are set first so worker processes and OpenMP pick them up,
+    then torch is configured directly if it is installed.
+    """
+    plan = plan_threads(mode, workers)
+    os.environ['OMP_NUM_THREADS'] = str(plan['intra_op'])
+    os.environ['MKL_NUM_THREADS'] = str(plan['intra_op'])
+    os.environ['TOKENIZERS_PARALLELISM'] = plan['tokenizers_parallelism']
+
+    try:
+        import torch
+    except ImportError:
+        torch = None
+
+    if torch is not None:
+        torch.set_num_threads(plan['intra_op'])
+        try:
+            torch.set_num_interop_threads(plan['inter_op'])
+        except RuntimeError:
+            # Only allowed before torch runs any parallel work
+            logger.warning("Torch inter-op threads already started, keeping their current count")
+            plan['inter_op'] = torch.get_num_interop_threads()
+
+    settings.clear()
+    settings.update(plan)
+    logger.info(f"Inference threads for {mode} mode: {plan['intra_op']} intra-op, {plan['inter_op']} inter-op "
+                f"on {plan['cores']} cores, tokenizer parallelism {plan['tokenizers_parallelism']}")
+    return plan
@@ -0,0 +1,250 @@
+import os
+import re
+import time
+import heapq
+import hashlib
+import threading
+from array import array
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+from src.components.scheduler import QuotaScheduler, BATCH
+from src.logger import setup_logger
+
+logger = setup_logger()
+
+# Warm-up configuration
+WARMUP_TOP_N = int(os.getenv('WARMUP_TOP_N', '20'))
+WARMUP_QUOTA_SHARE = float(os.getenv('WARMUP_QUOTA_SHARE', '0.2'))
+WARMUP_HOURS = os.getenv('WARMUP_HOURS', '3-5')
+WARMUP_SCHEDULER = os.getenv('WARMUP_SCHEDULER', 'false').lower() == 'true'
+
+# Frequency sketch sizing
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+TRACKED_CANDIDATES = 256
+
+_LOGGED_QUERY_PATTERN = re.compile(r' - Original query: (.+)$')
+
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so repeated queries count together"""
+    return ' '.join(query.lower().split())
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch; estimates never undercount
+    """
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self._rows = [array('L', [0]) * width for _ in range(depth)]
+
+    def _indexes(self, item: str) -> Iterable[Tuple[int, int]]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=8 * self.depth).digest()
+        for row in range(self.depth):
+            yield row, int.from_bytes(digest[row * 8:(row + 1) * 8], 'little') % self.width
+
+    def add(self, item: str, count: int = 1) -> int:
+        """
+        Count an item and return its new estimate
+        """
+        estimate = None
+        for row, index in self._indexes(item):
+            self._rows[row][index] += count
+            value = self._rows[row][index]
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        return min(self._rows[row][index] for row, index in self._indexes(item))
+
+class QueryTracker:
+    """
+    Tracks the most frequent queries with a count-min sketch and a bounded candidate set
+    """
+    def __init__(self, capacity: int = TRACKED_CANDIDATES):
+        self.capacity = capacity
+        self.sketch = CountMinSketch()
+        self._candidates = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str) -> None:
+        query = normalize_query(query)
+        if not query:
+            return
+        with self._lock:
+            estimate = self.sketch.add(query)
+            if query in self._candidates or len(self._candidates) < self.capacity:
+                self._candidates[query] = estimate
+                return
+            # Replace the weakest candidate if this query has overtaken it
+            weakest = min(self._candidates, key=self._candidates.get)
+            if estimate > self._candidates[weakest]:
+                del self._candidates[weakest]
+                self._candidates[query] = estimate
+
+    def top(self, n: int = WARMUP_TOP_N) -> List[Tuple[str, int]]:
+        with self._lock:
+            return heapq.nlargest(n, self._candidates.items(), key=lambda item: item[1])
+
+    def mine_logs(self, logs_dir: str = os.path.join(os.getcwd(), 'logs'), max_age_days: int = 7) -> int:
+        """
+        Feed queries from recent log files into the tracker; returns the number of queries read
+        """
+        if not os.path.isdir(logs_dir):
+            return 0
+
+        cutoff = time.time() - max_age_days * 86400
+        mined = 0
+        for name in os.listdir(logs_dir):
+            path = os.path.join(logs_dir, name)
+            if not name.endswith('.log') or os.path.getmtime(path) < cutoff:
+                continue
+            with open(path, encoding='utf-8', errors='replace') as fh:
+                for line in fh:
+                    match = _LOGGED_QUERY_PATTERN.search(line.rstrip('\n'))
+                    if match:
+                        self.record(match.group(1))
+                        mined += 1
+        return mined
+
+class WarmupJob:
+    """
+    Precomputes LLM understanding, search results and embeddings for the most popular queries
+    """
+    def __init__(self, tracker: QueryTracker, process: Callable[[str], object], quota: QuotaScheduler,
+                 top_n: int = WARMUP_TOP_N, quota_share: float = WARMUP_QUOTA_SHARE, window: str = WARMUP_HOURS):
+        self.tracker = tracker
+        self.process = process
+        self.quota = quota
+        self.top_n = top_n
+        self.quota_share = quota_share
+        self.window = window
+        self.last_run = None
+        self.last_warmed = 0
+        self._running = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    def start(self) -> bool:
+        """
+        Run the job on a background thread; False if a run is already in progress
+        """
+        if not self._running.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._run()
+            finally:
+                self._running.release()
+
+        threading.Thread(target=run, name='warmup', daemon=True).start()
+        return True
+
+    def _wait_for_quota(self, deadline: float) -> bool:
+        """
+        Wait for the bucket to refill enough for batch work; False if that cannot happen before the deadline
+        """
+        while not self.quota.available(BATCH):
+            wait = self.quota.wait_time(BATCH)
+            if wait is None:
+                logger.info("Warm-up stopped, the rest of today's quota is reserved for interactive use")
+                return False
+            if time.time() + wait > deadline:
+                logger.info("Warm-up stopped, the quota will not refill before the off-peak window closes")
+                return False
+            logger.debug(f"Warm-up waiting {wait:.0f}s for the quota to refill")
+            time.sleep(wait + 1)
+        return True
+
+    def run(self) -> int:
+        """
+        Warm the top queries within the configured share of the daily quota; returns queries warmed
+
+        Inside the off-peak window the job waits for the quota to refill rather than giving up.
+        Returns 0 without warming anything if another run is in progress.
+        """
+        if not self._running.acquire(blocking=False):
+            logger.info("Warm-up already running, skipping this run")
+            return 0
+        try:
+            return self._run()
+        finally:
+            self._running.release()
+
+    def _run(self) -> int:
+        deadline = time.time() + seconds_until_window_closes(self.window)
+        budget = int(self.quota.daily_limit * self.quota_share)
+        start_used = self.quota.used
+        warmed = 0
+        start = time.perf_counter()
+
+        for query, count in self.tracker.top(self.top_n):
+            if self.quota.used - start_used >= budget:
+                logger.info(f"Warm-up stopped after spending its budget of {budget} API calls")
+                break
+            if not self._wait_for_quota(deadline):
+                break
+            try:
+                self.process(query)
+                warmed += 1
+                logger.debug(f"Warmed query seen ~{count} times: {query}")
+            except Exception as e:
+                logger.error(f"Warm-up failed for {query}: {e}")
+
+        self.last_run = datetime.now()
+        self.last_warmed = warmed
+        logger.info(f"Warmed {warmed} queries using {self.quota.used - start_used} API calls "
+                    f"in {time.perf_counter() - start:.1f}s")
+        return warmed
+
+def _parse_hours(window: str) -> Tuple[int, int]:
+    start, _, end = window.partition('-')
+    return int(start) % 24, int(end or start) % 24
+
+def seconds_until_window(window: str = WARMUP_HOURS, now: Optional[datetime] = None) -> float:
+    """
+    Seconds until the next off-peak window opens, or 0 if we are inside it
+    """
+    now = now or datetime.now()
+    start, end = _parse_hours(window)
+    hour = now.hour
+    inside = start <= hour < end if start < end else (hour >= start or hour < end)
+    if inside:
+        return 0.0
+    opens = now.replace(hour=start, minute=0, second=0, microsecond=0)
+    if opens <= now:
+        opens += timedelta(days=1)
+    return (opens - now).total_seconds()
+
+def seconds_until_window_closes(window: str = WARMUP_HOURS, now: Optional[datetime] = None) -> float:
+    """
+    Seconds left in the off-peak window, or 0 if we are outside it
+    """
+    now = now or datetime.now()
+    if seconds_until_window(window, now) > 0:
+        return 0.0
+    _, end = _parse_hours(window)
+    closes = now.replace(hour=end, minute=0, second=0, microsecond=0)
+    if closes <= now:
+        closes += timedelta(days=1)
+    return (closes - now).total_seconds()
+
+def start_scheduler(job: WarmupJob, window: str = WARMUP_HOURS) -> threading.Thread:
+    """
+    Run the warm-up job once per day inside the off-peak window on a daemon thread
+    """
+    def loop():
+        while True:
+            wait = seconds_until_window(window)
+            if wait == 0 and (job.last_run is None or job.last_run.date() < datetime.now().date()):
+                job.run()
+                continue
+            time.sleep(wait if wait > 0 else 3600)
+
+    thread = threading.Thread(target=loop, name='warmup-scheduler', daemon=True)
+    thread.start()
+    logger.info(f"Warm-up scheduler started for off-peak hours {window}")
+    return thread
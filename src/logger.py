@@ -4,6 +4,11 @@ from datetime import datetime
 
 def setup_logger():
     """Configure and return a logger instance."""
+    logger = logging.getLogger(__name__)
+    # Every module calls this at import; only the first call adds handlers
+    if logger.handlers:
+        return logger
+
     # Create timestamp for log file name
     timestamp = datetime.now().strftime('%m_%d_%Y_%H_%M_%S')
     LOG_FILE = f'{timestamp}.log'
@@ -16,7 +21,6 @@ def setup_logger():
     log_file_path = os.path.join(logs_dir, LOG_FILE)
     
     # Configure logging with both console and file handlers
-    logger = logging.getLogger(__name__)
     logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
     
     # Format for logs